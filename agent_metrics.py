@@ -0,0 +1,252 @@
+"""
+Agent Metrics
+Lightweight counters, gauges and latency histograms for the lab agents
+
+Instrumented classes take an optional registry (``SensorAgent(metrics=...)``)
+or read a ``metrics`` class attribute (``ReceiverAgent.metrics``,
+``SenderAgent.metrics``, ``RescueAgent.metrics``). When it is None, which is
+the default, the only cost on the hot path is that None check.
+
+Expose a registry with ``serve_prometheus`` (Prometheus text format over
+HTTP) or ``SnapshotWriter`` (periodic JSON file).
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, 100us .. 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Value that can go up and down, e.g. a queue depth"""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """Bucketed distribution of observed values, e.g. latencies in seconds"""
+
+    kind = "histogram"
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (math.inf,), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Named, labelled metrics; repeated lookups return the same object"""
+
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, LabelKey], object] = {}
+        self._help: Dict[str, str] = {}
+
+    def _get(self, cls, name: str, help: str, labels: Dict[str, str], **kwargs):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = cls(**kwargs)
+            if help:
+                self._help.setdefault(name, help)
+        return metric
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", **labels) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  **labels) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def time(self, name: str, help: str = "", **labels) -> _Timer:
+        """Context manager that observes the elapsed seconds into a histogram"""
+        return _Timer(self.histogram(name, help, **labels))
+
+    def snapshot(self) -> Dict:
+        """All metrics as ``{name: [{"labels": ..., "value": ...}, ...]}``"""
+        out: Dict[str, list] = {}
+        for (name, labels), metric in sorted(self._metrics.items(), key=lambda kv: kv[0]):
+            out.setdefault(name, []).append({"labels": dict(labels), "value": metric.snapshot()})
+        return out
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        typed = set()
+        for (name, labels), metric in sorted(self._metrics.items(), key=lambda kv: kv[0]):
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, n in zip(metric.buckets + (math.inf,), metric.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+async def serve_prometheus(registry: MetricsRegistry, host: str = "127.0.0.1",
+                           port: int = 9464) -> asyncio.AbstractServer:
+    """Serve ``registry`` as Prometheus text on ``http://host:port/metrics``"""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            path = request.split()[1] if len(request.split()) > 1 else b"/"
+            if path.split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", registry.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+class SnapshotWriter:
+    """Periodically writes ``registry.snapshot()`` to a JSON file
+
+    The file is replaced atomically, so readers never see a partial write.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: str = "metrics_snapshot.json",
+                 interval: float = 5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"timestamp": time.time(), "metrics": self.registry.snapshot()}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write()
+
+    async def stop(self):
+        """Stop the writer and write one final snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.write()
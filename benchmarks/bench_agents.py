@@ -0,0 +1,316 @@
+"""
+Benchmark suite for the agent communication stack
+
+Scenarios:
+    event_generation    lab2 Environment event generation rate
+    sensor_pipeline     lab2 Environment -> SensorAgent on a virtual clock
+    logger              lab 4 ACLMessageLogger append rate and summary cost
+    request_response    lab 4 Sender ask() -> Receiver round trips (loopback)
+    fan_in              lab 4 N senders -> 1 receiver (loopback)
+
+Each scenario runs in a fresh process so its peak RSS is its own. Results
+are written as JSON; pass --compare with an earlier results file to flag
+throughput/latency regressions.
+
+Usage:
+    python benchmarks/bench_agents.py [-o results.json] [--scenario NAME ...]
+                                      [--quick] [--compare old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+for lab in ("lab2", "lab 4"):
+    path = str(ROOT / lab)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 (nearest rank) of latency samples, in milliseconds"""
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(q):
+        return ordered[min(last, int(q * len(ordered)))] * 1000
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def result(ops: int, elapsed: float, samples: List[float], **extra) -> Dict:
+    out = {"ops": ops, "elapsed_s": elapsed, "ops_per_sec": ops / elapsed if elapsed else None}
+    out.update(percentiles(samples))
+    out.update(extra)
+    return out
+
+
+def _quiet_logger(name: str) -> logging.Logger:
+    log = logging.getLogger(name)
+    log.handlers[:] = [logging.NullHandler()]
+    log.propagate = False
+    return log
+
+
+def bench_event_generation(quick: bool) -> Dict:
+    from disaster_environment import Environment
+
+    n = 50_000 if quick else 500_000
+    chunk = 1000
+    out = {}
+
+    env = Environment(seed=1, base_probability=1.0)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(n // chunk):
+        t = time.perf_counter()
+        for _ in range(chunk):
+            env.generate_event()
+        samples.append((time.perf_counter() - t) / chunk)
+    out["scalar"] = result(n, time.perf_counter() - start, samples)
+
+    for name, make in (
+        ("batch_dicts", lambda e: e.generate_events(chunk, sequential_ids=True)),
+        ("batch_columnar", lambda e: e.generate_batch(chunk)),
+    ):
+        env = Environment(seed=1, base_probability=1.0)
+        samples = []
+        start = time.perf_counter()
+        for _ in range(n // chunk):
+            t = time.perf_counter()
+            make(env)
+            samples.append((time.perf_counter() - t) / chunk)
+        out[name] = result(n, time.perf_counter() - start, samples)
+    return out
+
+
+def bench_sensor_pipeline(quick: bool) -> Dict:
+    from disaster_environment import Environment
+    from sensor_agent import SensorAgent
+    from sim_clock import VirtualClock
+
+    duration = 2_000.0 if quick else 20_000.0
+    interval = 0.1
+
+    async def run(batched: bool):
+        clock = VirtualClock()
+        q = asyncio.Queue()
+        env = Environment(seed=1, base_probability=1.0, clock=clock)
+        sensor = SensorAgent(q, logger=_quiet_logger("bench_sensor"), clock=clock, echo=False)
+        samples = []
+        events = 0
+        env_task = asyncio.create_task(env.run(q, interval=interval, duration=duration))
+        start = time.perf_counter()
+        while not env_task.done() or not q.empty():
+            t = time.perf_counter()
+            if batched:
+                got = len(await sensor.monitor_batch(1000, max_latency=interval))
+            else:
+                got = 1 if await sensor.monitor_once(timeout=interval) is not None else 0
+            if got:
+                samples.append(time.perf_counter() - t)
+                events += got
+        return result(events, time.perf_counter() - start, samples,
+                      simulated_s=clock.now())
+
+    return {"monitor_once": asyncio.run(run(False)), "monitor_batch": asyncio.run(run(True))}
+
+
+def bench_logger(quick: bool) -> Dict:
+    from message_logger import ACLMessageLogger
+
+    n = 50_000 if quick else 500_000
+    msg_logger = ACLMessageLogger("bench_log.json")
+    samples = []
+    start = time.perf_counter()
+    for i in range(n):
+        t = time.perf_counter()
+        msg_logger.log_message(f"sender{i % 50}@localhost", "receiver@localhost",
+                               "inform" if i % 3 else "request", "payload", "outgoing")
+        samples.append(time.perf_counter() - t)
+    append = result(n, time.perf_counter() - start, samples)
+
+    summary_samples = []
+    start = time.perf_counter()
+    for _ in range(1000):
+        t = time.perf_counter()
+        msg_logger.get_summary()
+        summary_samples.append(time.perf_counter() - t)
+    summary = result(1000, time.perf_counter() - start, summary_samples, history=n)
+    return {"append": append, "summary": summary}
+
+
+def _spade_available() -> bool:
+    try:
+        import spade  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _ask_loop(behaviour, to: str, count: int, samples: List[float]):
+    for _ in range(count):
+        t = time.perf_counter()
+        reply = await behaviour.ask(to, "request", "Please provide system diagnostics report", timeout=5)
+        if reply is not None:
+            samples.append(time.perf_counter() - t)
+
+
+async def _run_loopback(senders: int, asks_per_sender: int) -> Dict:
+    from loopback import LoopbackBus
+    from receiver_agent import ReceiverAgent
+    from sender_agent import SenderAgent
+
+    for name in ("ReceiverAgent", "SenderAgent", "LoopbackBus"):
+        _quiet_logger(name)
+
+    class IdleSender(SenderAgent):
+        # Only the reply router; the benchmark drives ask() itself
+        async def setup(self):
+            self.pending_replies = {}
+            self.rtt_samples = []
+            self.add_behaviour(self.ReplyRouterBehaviour())
+            self.driver = SenderAgent.SendBehaviour()
+            self.driver.set_agent(self)
+
+    class BenchReceiver(ReceiverAgent):
+        max_concurrent_handlers = 256
+
+    bus = LoopbackBus()
+    receiver = BenchReceiver("receiver@localhost", "receiver")
+    await bus.start(receiver)
+    agents = [IdleSender(f"sender{i}@localhost", "sender") for i in range(senders)]
+    for a in agents:
+        await bus.start(a)
+        bus._attach(a.driver)
+
+    samples: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_ask_loop(a.driver, "receiver@localhost", asks_per_sender, samples)
+                           for a in agents))
+    elapsed = time.perf_counter() - start
+
+    for a in agents:
+        await bus.stop(a)
+    await bus.stop(receiver)
+    return result(len(samples), elapsed, samples, senders=senders,
+                  failed=senders * asks_per_sender - len(samples))
+
+
+def bench_request_response(quick: bool) -> Dict:
+    if not _spade_available():
+        return {"skipped": "spade is not installed"}
+    return asyncio.run(_run_loopback(1, 500 if quick else 5000))
+
+
+def bench_fan_in(quick: bool) -> Dict:
+    if not _spade_available():
+        return {"skipped": "spade is not installed"}
+    senders = 20 if quick else 100
+    return asyncio.run(_run_loopback(senders, 50 if quick else 100))
+
+
+SCENARIOS: Dict[str, Callable[[bool], Dict]] = {
+    "event_generation": bench_event_generation,
+    "sensor_pipeline": bench_sensor_pipeline,
+    "logger": bench_logger,
+    "request_response": bench_request_response,
+    "fan_in": bench_fan_in,
+}
+
+
+def _run_scenario(name: str, quick: bool) -> Dict:
+    out = SCENARIOS[name](quick)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out["peak_rss_kb"] = rss // 1024 if sys.platform == "darwin" else rss
+    return out
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old: Dict, new: Dict, tolerance: float = 0.10) -> List[str]:
+    """Describe metrics that got worse than ``old`` by more than ``tolerance``"""
+    before = _flatten(old.get("scenarios", {}))
+    after = _flatten(new.get("scenarios", {}))
+    regressions = []
+    for name, value in after.items():
+        prev = before.get(name)
+        if not prev:
+            continue
+        if name.endswith("ops_per_sec") and value < prev * (1 - tolerance):
+            regressions.append(f"{name}: {prev:.1f} -> {value:.1f} ({value / prev - 1:+.0%})")
+        elif name.endswith("_ms") and value > prev * (1 + tolerance):
+            regressions.append(f"{name}: {prev:.4f} -> {value:.4f} ({value / prev - 1:+.0%})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--compare", help="earlier results file to check for regressions")
+    args = parser.parse_args(argv)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": args.quick,
+        "scenarios": {},
+    }
+    ctx = get_context("spawn")
+    for name in args.scenario or SCENARIOS:
+        print(f"Running {name}...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            report["scenarios"][name] = pool.submit(_run_scenario, name, args.quick).result()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["scenarios"], indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Compact Log Format - Lab 4: Agent Communication using FIPA-ACL
+Binary, dictionary-encoded storage for ACL message records
+
+Layout (little endian)::
+
+    magic "ACLB", version u8, flags u8 (bit 0: zlib-compressed body)
+    body:
+        u32 count, then count x (u32 length, utf-8 bytes)   string table
+        u32 count, then count x (u32 length, utf-8 bytes)   content table
+        u32 count, then count x record
+
+    record: i64 timestamp, u8 record flags, u32 type, u32 sender,
+            u32 receiver, u32 performative, u32 content
+
+JIDs, performatives and directions are stored once in the string table
+and referenced by index; identical message bodies are stored once in the
+content table. Timestamps are microseconds since the epoch, or a string
+table index when they do not round-trip through ``datetime.isoformat``.
+"""
+
+import json
+import os
+import struct
+import sys
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+MAGIC = b"ACLB"
+VERSION = 1
+FLAG_ZLIB = 0x01
+RECORD_TS_STRING = 0x01
+
+_HEADER = struct.Struct("<4sBB")
+_COUNT = struct.Struct("<I")
+_RECORD = struct.Struct("<qBIIIII")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+FIELDS = ("timestamp", "type", "sender", "receiver", "performative", "content")
+
+
+class _Table:
+    """Insertion-ordered string table with hash lookup for deduplication"""
+
+    def __init__(self):
+        self.items: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.items)
+            self.items.append(value)
+        return idx
+
+    def pack(self) -> bytes:
+        parts = [_COUNT.pack(len(self.items))]
+        for item in self.items:
+            data = item.encode("utf-8")
+            parts.append(_COUNT.pack(len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+
+def _encode_timestamp(ts: str, strings: _Table):
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        dt = None
+    if dt is not None and dt.tzinfo is None and dt.isoformat() == ts:
+        return (dt - _EPOCH) // _MICROSECOND, 0
+    return strings.add(ts), RECORD_TS_STRING
+
+
+def dump_compact(records: Iterable[Dict], path: str, compress: bool = False) -> Path:
+    """Write message records in the compact binary format
+
+    Args:
+        records: Records as produced by ACLMessageLogger.log_message
+        path: Output file path
+        compress: zlib-compress the body as well
+
+    Returns:
+        Path of the written file
+    """
+    strings = _Table()
+    contents = _Table()
+    packed = []
+    pack = _RECORD.pack
+    for record in records:
+        if set(record) != set(FIELDS):
+            raise ValueError(f"unsupported record fields: {sorted(record)}")
+        ts, flags = _encode_timestamp(record["timestamp"], strings)
+        packed.append(pack(
+            ts, flags,
+            strings.add(record["type"]),
+            strings.add(record["sender"]),
+            strings.add(record["receiver"]),
+            strings.add(record["performative"]),
+            contents.add(record["content"]),
+        ))
+
+    body = strings.pack() + contents.pack() + _COUNT.pack(len(packed)) + b"".join(packed)
+    if compress:
+        body = zlib.compress(body)
+    path = Path(path)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, FLAG_ZLIB if compress else 0))
+        f.write(body)
+    return path
+
+
+def _unpack_table(buf: bytes, pos: int):
+    (count,) = _COUNT.unpack_from(buf, pos)
+    pos += _COUNT.size
+    items = []
+    for _ in range(count):
+        (length,) = _COUNT.unpack_from(buf, pos)
+        pos += _COUNT.size
+        items.append(buf[pos:pos + length].decode("utf-8"))
+        pos += length
+    return items, pos
+
+
+def load_compact(path: str) -> List[Dict]:
+    """Read every record from a compact log file"""
+    data = Path(path).read_bytes()
+    magic, version, flags = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} compact ACL log")
+    body = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    strings, pos = _unpack_table(body, 0)
+    contents, pos = _unpack_table(body, pos)
+    (count,) = _COUNT.unpack_from(body, pos)
+    pos += _COUNT.size
+
+    records = []
+    for ts, rflags, typ, sender, receiver, perf, content in _RECORD.iter_unpack(
+            body[pos:pos + count * _RECORD.size]):
+        if rflags & RECORD_TS_STRING:
+            timestamp = strings[ts]
+        else:
+            timestamp = (_EPOCH + ts * _MICROSECOND).isoformat()
+        records.append({
+            "timestamp": timestamp,
+            "type": strings[typ],
+            "sender": strings[sender],
+            "receiver": strings[receiver],
+            "performative": strings[perf],
+            "content": contents[content],
+        })
+    return records
+
+
+def json_to_compact(src: str, dst: Optional[str] = None, compress: bool = False) -> Path:
+    """Convert a JSON array or JSON Lines log to the compact format"""
+    from log_reader import ACLLogReader
+
+    src = Path(src)
+    dst = Path(dst) if dst else src.with_suffix(".aclb")
+    with open(src, "rb") as f:
+        is_array = f.read(64).lstrip().startswith(b"[")
+    if is_array:
+        with open(src, encoding="utf-8") as f:
+            return dump_compact(json.load(f), dst, compress)
+    with ACLLogReader(str(src)) as reader:
+        return dump_compact(reader, dst, compress)
+
+
+def compact_to_json(src: str, dst: Optional[str] = None, overwrite: bool = False) -> Path:
+    """Convert a compact log back to the indented JSON array of ``save_logs``
+
+    Args:
+        src: Path to a compact log
+        dst: Output path, defaults to ``src`` with a ``.restored.json`` suffix
+        overwrite: Replace ``dst`` if it already exists
+
+    Raises:
+        FileExistsError: ``dst`` exists and ``overwrite`` is False. The
+            default suffix is not ``.json`` because that is the live
+            ``save_logs`` file of the same log.
+    """
+    src = Path(src)
+    dst = Path(dst) if dst else src.with_suffix(".restored.json")
+    if dst.exists() and not overwrite:
+        raise FileExistsError(f"{dst} already exists")
+    records = load_compact(src)
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(records, f, indent=2)
+    os.replace(tmp, dst)
+    return dst
+
+
+if __name__ == "__main__":
+    overwrite = "--overwrite" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--overwrite"]
+    if len(args) < 2 or args[0] not in ("to-compact", "to-json"):
+        print("usage: compact_log.py to-compact|to-json SRC [DST] [--overwrite]")
+        sys.exit(2)
+    dst = args[2] if len(args) > 2 else None
+    if args[0] == "to-compact":
+        out = json_to_compact(args[1], dst)
+    else:
+        out = compact_to_json(args[1], dst, overwrite)
+    print(f"Wrote {out}")
@@ -0,0 +1,212 @@
+"""
+Log Reader - Lab 4: Agent Communication using FIPA-ACL
+Lazy, memory-mapped access to large JSON Lines communication logs
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from message_logger import _time_key
+
+
+# Where ACLLogReader.open() keeps JSON Lines conversions of JSON array logs
+CONVERTED_DIR = Path(tempfile.gettempdir()) / "acl_log_reader"
+
+
+def convert_json_to_jsonl(src: str, dst: Optional[str] = None, overwrite: bool = False) -> Path:
+    """Convert a ``save_logs`` JSON array file into JSON Lines
+
+    Args:
+        src: Path to an indented JSON array log (e.g. sample_communication_log.json)
+        dst: Output path, defaults to ``src`` with a ``.converted.jsonl`` suffix
+        overwrite: Replace ``dst`` if it already exists
+
+    Returns:
+        Path of the JSON Lines file
+
+    Raises:
+        FileExistsError: ``dst`` exists and ``overwrite`` is False. The
+            default suffix is not ``.jsonl`` because that is the stream file
+            ACLMessageLogger(stream=True) appends to for the same log.
+    """
+    src = Path(src)
+    dst = Path(dst) if dst else src.with_suffix(".converted.jsonl")
+    if dst.resolve() == src.resolve():
+        raise ValueError(f"Cannot convert {src} onto itself")
+    if dst.exists() and not overwrite:
+        raise FileExistsError(f"{dst} already exists")
+    with open(src, encoding="utf-8") as f:
+        records = json.load(f)
+    # Write next to dst and rename, so a reader never sees a partial file
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(tmp, dst)
+    return dst
+
+
+class ACLLogReader:
+    """Read-only view of a JSON Lines message log backed by ``mmap``
+
+    Opening the log only maps the file and loads (or builds) an index of
+    line offsets; records are decoded when they are accessed. The index is
+    cached next to the log as ``<log>.idx`` and rebuilt when the log's
+    size or modification time changes.
+    """
+
+    def __init__(self, path: str, use_index_cache: bool = True):
+        """Open a JSON Lines log
+
+        Args:
+            path: Path to a ``.jsonl`` log, e.g. written by ACLMessageLogger(stream=True)
+            use_index_cache: Load/save the offset index from ``<path>.idx``
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._index_path = self.path.with_name(self.path.name + ".idx")
+        self._offsets = self._load_index() if use_index_cache else None
+        if self._offsets is None:
+            self._offsets = self._build_index()
+            if use_index_cache:
+                self._save_index()
+        self._keys: Optional[array] = None
+
+    @classmethod
+    def open(cls, path: str, converted_dir: Optional[str] = None, **kwargs) -> "ACLLogReader":
+        """Open a log in either format
+
+        A JSON array file (the ``save_logs`` / sample_communication_log.json
+        format) is first converted to JSON Lines in ``converted_dir``
+        (default: ``CONVERTED_DIR`` under the system temp directory), never
+        next to the source. A conversion is reused while it is newer than
+        the source file.
+        """
+        path = Path(path)
+        with open(path, "rb") as f:
+            head = f.read(64).lstrip()
+        if head.startswith(b"["):
+            path = _converted(path, Path(converted_dir) if converted_dir else CONVERTED_DIR)
+        return cls(str(path), **kwargs)
+
+    def _signature(self) -> array:
+        st = os.stat(self.path)
+        return array("Q", [st.st_size, st.st_mtime_ns])
+
+    def _load_index(self) -> Optional[array]:
+        try:
+            raw = self._index_path.read_bytes()
+        except OSError:
+            return None
+        data = array("Q")
+        data.frombytes(raw[: len(raw) - len(raw) % data.itemsize])
+        if len(data) < 2 or data[:2] != self._signature():
+            return None
+        return data[2:]
+
+    def _save_index(self):
+        try:
+            with open(self._index_path, "wb") as f:
+                (self._signature() + self._offsets).tofile(f)
+        except OSError:
+            pass
+
+    def _build_index(self) -> array:
+        # Start and end offset of every complete line, so record i spans
+        # offsets[2i]:offsets[2i + 1]. Empty lines and a trailing partial
+        # line (a writer mid-append) are skipped.
+        offsets = array("Q")
+        append = offsets.append
+        find = self._mm.find
+        pos = 0
+        while True:
+            nl = find(b"\n", pos)
+            if nl == -1:
+                break
+            if nl > pos:
+                append(pos)
+                append(nl)
+            pos = nl + 1
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) // 2
+
+    def __getitem__(self, i: int) -> Dict:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("record index out of range")
+        return json.loads(self._mm[self._offsets[2 * i]:self._offsets[2 * i + 1]])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def _timestamp(self, i: int) -> str:
+        return self[i]["timestamp"]
+
+    def _time_keys(self) -> array:
+        # Epoch seconds of every record, clamped to be non-decreasing like
+        # ACLMessageLogger's in-memory index, so a clock step back (e.g. the
+        # end of DST) keeps the keys sorted for bisect
+        if self._keys is None:
+            keys = array("d")
+            last = float("-inf")
+            for i in range(len(self)):
+                last = max(last, _time_key(self._timestamp(i)))
+                keys.append(last)
+            self._keys = keys
+        return self._keys
+
+    def between(self, since: Union[str, datetime, None] = None,
+                until: Union[str, datetime, None] = None) -> Iterator[Dict]:
+        """Yield records with ``since <= timestamp <= until``
+
+        Bounds and timestamps are compared as epoch seconds, so aware
+        datetimes in any timezone work; naive ones are local time. The first
+        call reads every timestamp once to build the key table, after which
+        the range is located by binary search.
+        """
+        keys = self._time_keys()
+        lo = bisect_left(keys, _time_key(since)) if since is not None else 0
+        hi = bisect_right(keys, _time_key(until), lo) if until is not None else len(self)
+        for i in range(lo, hi):
+            yield self[i]
+
+    def close(self):
+        """Unmap and close the log file"""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _converted(src: Path, directory: Path) -> Path:
+    # One cache file per absolute source path
+    digest = hashlib.sha1(str(src.resolve()).encode()).hexdigest()[:12]
+    dst = directory / f"{src.stem}-{digest}.converted.jsonl"
+    try:
+        if dst.stat().st_mtime_ns > src.stat().st_mtime_ns:
+            return dst
+    except FileNotFoundError:
+        pass
+    directory.mkdir(parents=True, exist_ok=True)
+    return convert_json_to_jsonl(src, dst, overwrite=True)
+
@@ -0,0 +1,104 @@
+"""
+Loopback Transport - Lab 4: Agent Communication using FIPA-ACL
+In-memory message bus for running SPADE agents without an XMPP server
+"""
+
+import logging
+from typing import Dict
+
+from spade.message import Message
+
+logger = logging.getLogger("LoopbackBus")
+
+
+class LoopbackBus:
+    """Delivers ``spade.message.Message`` objects between agents in one process
+
+    Agents started with ``bus.start(agent)`` run their ``setup()`` and
+    behaviours exactly as with ``agent.start()``, but never connect to XMPP.
+    Every ``behaviour.send()`` is routed by the bus straight into the
+    mailboxes of the recipient's matching behaviours, so the behaviours
+    themselves need no changes.
+    """
+
+    def __init__(self, message_logger=None):
+        """Create an empty bus
+
+        Args:
+            message_logger: Optional ACLMessageLogger that records every
+                delivered message as outgoing and incoming
+        """
+        self.agents: Dict[str, object] = {}
+        self.message_logger = message_logger
+        self.delivered = 0
+        self.undeliverable = 0
+
+    def register(self, agent):
+        """Make ``agent`` reachable at its bare JID"""
+        self.agents[_bare(agent.jid)] = agent
+        original_add = agent.add_behaviour
+
+        # Behaviours added later (e.g. from inside another behaviour) must
+        # send through the bus too
+        def add_behaviour(behaviour, template=None):
+            self._attach(behaviour)
+            return original_add(behaviour, template)
+
+        agent.add_behaviour = add_behaviour
+
+    async def start(self, agent):
+        """Start ``agent`` on the bus instead of connecting it to XMPP"""
+        self.register(agent)
+        await agent.setup()
+        agent._alive.set()
+        for behaviour in agent.behaviours:
+            self._attach(behaviour)
+            if not behaviour.is_running:
+                behaviour.start()
+        logger.debug(f"Started {agent.jid} on loopback bus")
+
+    async def stop(self, agent):
+        """Stop the behaviours of ``agent`` and take it off the bus"""
+        for behaviour in agent.behaviours:
+            behaviour.kill()
+        agent._alive.clear()
+        self.agents.pop(_bare(agent.jid), None)
+
+    def _attach(self, behaviour):
+        if getattr(behaviour, "_loopback_bus", None) is self:
+            return
+        behaviour._loopback_bus = self
+
+        async def send(msg: Message):
+            await self.deliver(behaviour, msg)
+
+        behaviour.send = send
+        # FSM states are behaviours of their own and send directly
+        get_states = getattr(behaviour, "get_states", None)
+        if get_states is not None:
+            for state in get_states().values():
+                self._attach(state)
+
+    async def deliver(self, behaviour, msg: Message):
+        """Route ``msg`` sent from ``behaviour`` to its recipient's mailboxes"""
+        if not msg.sender:
+            msg.sender = str(behaviour.agent.jid)
+        target = self.agents.get(_bare(msg.to))
+        if target is None:
+            self.undeliverable += 1
+            logger.warning(f"No agent {msg.to} on loopback bus, message dropped")
+            return
+
+        if self.message_logger is not None:
+            performative = msg.metadata.get("performative", "unknown")
+            self.message_logger.log_message(str(msg.sender), str(msg.to), performative, msg.body, "outgoing")
+            self.message_logger.log_message(str(msg.sender), str(msg.to), performative, msg.body, "incoming")
+
+        for receiver in target.behaviours:
+            if receiver.match(msg):
+                await receiver.enqueue(msg)
+        self.delivered += 1
+
+
+def _bare(jid) -> str:
+    return str(jid).split("/")[0]
@@ -5,6 +5,7 @@ Demonstrates FIPA-ACL message exchange between agents
 
 import asyncio
 import logging
+import sys
 from datetime import datetime
 from message_logger import ACLMessageLogger
 
@@ -249,9 +250,42 @@ async def main():
         logger.info("Process finished.")
 
 
+async def loopback_main(timeout: float = 15.0):
+    """Run the real Sender and Receiver agents over the in-memory loopback bus"""
+    from loopback import LoopbackBus
+    from receiver_agent import ReceiverAgent
+    from sender_agent import SenderAgent
+
+    bus = LoopbackBus(message_logger=msg_logger)
+    receiver = ReceiverAgent("receiver@localhost", "receiver")
+    sender = SenderAgent("sender@localhost", "sender")
+    try:
+        logger.info("Starting agents on the loopback bus (no XMPP server)...")
+        await bus.start(receiver)
+        await bus.start(sender)
+
+        send_behaviours = [b for b in sender.behaviours if isinstance(b, SenderAgent.SendBehaviour)]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not all(b.is_done() for b in send_behaviours) and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+
+        logger.info(f"Loopback bus delivered {bus.delivered} messages")
+        msg_logger.print_summary()
+        msg_logger.save_logs()
+        logger.info("✅ Message logs saved to: agent_communication_log.json")
+    finally:
+        await bus.stop(sender)
+        await bus.stop(receiver)
+        logger.info("Process finished.")
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if "--loopback" in sys.argv:
+            asyncio.run(loopback_main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("\nAgent communication interrupted by user.")
     except Exception as e:
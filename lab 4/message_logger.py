@@ -3,26 +3,123 @@ Message Logger - Lab 4: Agent Communication using FIPA-ACL
 Utilities for logging and storing agent communication messages
 """
 
+import itertools
 import json
 import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Record fields that get a secondary index, keyed by query argument name
+INDEXED_FIELDS = {
+    "sender": "sender",
+    "receiver": "receiver",
+    "performative": "performative",
+    "direction": "type",
+}
 
 
 class ACLMessageLogger:
     """Logger for FIPA-ACL messages with file persistence"""
     
-    def __init__(self, log_file: str = "agent_communication_log.json"):
+    def __init__(self, log_file: str = "agent_communication_log.json", stream: bool = False,
+                 window: Optional[int] = None, fsync_interval: float = 1.0,
+                 rate_window: float = 60.0, resume: bool = False):
         """Initialize the message logger
         
         Args:
             log_file: Path to JSON file for storing message logs
+            stream: Append every record to a JSON Lines file (``log_file``
+                with a ``.jsonl`` suffix) as it is logged
+            window: Keep only the most recent ``window`` records in memory
+            fsync_interval: Most seconds a streamed record waits to be fsynced
+            rate_window: Length in seconds of the sliding window used for
+                per-performative message rates
+            resume: Continue an existing stream file (e.g. after a crash):
+                its records are loaded into the statistics and indexes and
+                new records are appended. By default each logger starts a
+                fresh stream file, and a non-empty one left by an earlier
+                session is kept as ``<name>.previous.<n>.jsonl``, where the
+                highest ``n`` is the most recent session
         """
         self.log_file = Path(log_file)
-        self.messages: List[Dict] = []
+        self.messages = deque(maxlen=window) if window else []
         self.logger = logging.getLogger(__name__)
-    
+        self.stream_file: Optional[Path] = None
+        self.fsync_interval = fsync_interval
+        self._stream = None
+        self._last_fsync = time.monotonic()
+        self._fsync_timer: Optional[threading.Timer] = None
+        self._fsync_lock = threading.Lock()
+        if stream:
+            self.stream_file = self.log_file.with_suffix(".jsonl")
+            if not resume and self.stream_file.exists() and self.stream_file.stat().st_size:
+                os.replace(self.stream_file, self._next_previous())
+
+        # Running statistics, updated by log_message so get_summary never
+        # has to rescan the message history
+        self._total = 0
+        self._by_type: Dict[str, int] = {}
+        self._by_performative: Dict[str, int] = {}
+        self._senders: Dict[str, None] = {}
+        self._receivers: Dict[str, None] = {}
+        self.rate_window = rate_window
+        self._recent = deque()
+        self._recent_by_performative: Dict[str, int] = {}
+
+        # Secondary indexes for query(): field -> value -> (seqs, records),
+        # a combined sender/receiver "pair" index, and a time key (epoch
+        # seconds) per in-memory record in log order. The record timestamps
+        # are naive local time and can go backwards (DST fall-back, clock
+        # steps), so the keys are clamped to never decrease; bisecting them
+        # stays valid, and a record logged during a step back sorts with
+        # the one before it.
+        self.window = window
+        self._index: Dict[str, Dict[object, Tuple[List[int], List[Dict]]]] = {
+            field: {} for field in (*INDEXED_FIELDS.values(), "pair")
+        }
+        self._times: List[float] = []
+        self._times_base = 0
+        self._last_time = float("-inf")
+
+        if self.stream_file is not None:
+            if resume:
+                self._replay_stream()
+            self._stream = open(self.stream_file, "a", encoding="utf-8")
+
+    def _next_previous(self) -> Path:
+        # <name>.previous.<n>.jsonl after the highest existing generation
+        pattern = re.compile(re.escape(self.log_file.stem) + r"\.previous\.(\d+)\.jsonl")
+        taken = [int(m.group(1)) for p in self.log_file.parent.glob(f"{self.log_file.stem}.previous.*.jsonl")
+                 if (m := pattern.fullmatch(p.name))]
+        return self.log_file.with_suffix(f".previous.{max(taken, default=0) + 1}.jsonl")
+
+    def _replay_stream(self):
+        try:
+            f = open(self.stream_file, "rb+")
+        except FileNotFoundError:
+            return
+        with f:
+            good = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.messages.append(record)
+                self._update_stats(record, recent=False)
+                self._update_index(record)
+            # Drop a torn last line left by a crash so appends start clean
+            f.truncate(good)
+
     def log_message(self, sender: str, receiver: str, performative: str, 
                    content: str, message_type: str = "outgoing"):
         """Log an ACL message
@@ -34,8 +131,9 @@ class ACLMessageLogger:
             content: Message body content
             message_type: "outgoing" or "incoming"
         """
+        now = datetime.now()
         message_record = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "type": message_type,
             "sender": sender,
             "receiver": receiver,
@@ -44,43 +142,265 @@ class ACLMessageLogger:
         }
         
         self.messages.append(message_record)
+        self._update_stats(message_record)
+        self._update_index(message_record, now.timestamp())
+        if self._stream is not None:
+            self._stream.write(json.dumps(message_record) + "\n")
+            # Hand every record to the OS at once, so killing the process
+            # loses nothing; fsync (against power loss) is batched, but a
+            # timer makes sure it happens within fsync_interval
+            self._stream.flush()
+            self._schedule_fsync()
         self.logger.debug(f"Logged {message_type} message from {sender}")
-    
+
+    def _update_stats(self, record: Dict, recent: bool = True):
+        perf = record["performative"]
+        self._total += 1
+        self._by_type[record["type"]] = self._by_type.get(record["type"], 0) + 1
+        self._by_performative[perf] = self._by_performative.get(perf, 0) + 1
+        self._senders[record["sender"]] = None
+        self._receivers[record["receiver"]] = None
+        if not recent:
+            return
+
+        now = time.monotonic()
+        self._recent.append((now, perf))
+        self._recent_by_performative[perf] = self._recent_by_performative.get(perf, 0) + 1
+        self._expire_recent(now)
+
+    def _expire_recent(self, now: float):
+        cutoff = now - self.rate_window
+        recent = self._recent
+        counts = self._recent_by_performative
+        while recent and recent[0][0] < cutoff:
+            _, perf = recent.popleft()
+            counts[perf] -= 1
+            if not counts[perf]:
+                del counts[perf]
+
+    def get_rates(self) -> Dict[str, float]:
+        """Messages per second for each performative over the last ``rate_window`` seconds"""
+        self._expire_recent(time.monotonic())
+        return {perf: count / self.rate_window for perf, count in self._recent_by_performative.items()}
+
+    def _update_index(self, record: Dict, time_key: Optional[float] = None):
+        seq = self._total - 1
+        for field, postings in self._index.items():
+            key = (record["sender"], record["receiver"]) if field == "pair" else record[field]
+            entry = postings.get(key)
+            if entry is None:
+                entry = postings[key] = ([], [])
+            entry[0].append(seq)
+            entry[1].append(record)
+        if time_key is None:
+            time_key = _time_key(record["timestamp"])
+        self._last_time = max(self._last_time, time_key)
+        self._times.append(self._last_time)
+
+        # With a bounded window, drop index entries for evicted records once
+        # they make up half the time list (amortised O(1) per message)
+        if self.window and len(self._times) >= 2 * self.window:
+            first = self._first_seq()
+            stale = first - self._times_base
+            del self._times[:stale]
+            self._times_base = first
+            for postings in self._index.values():
+                for value in list(postings):
+                    seqs, records = postings[value]
+                    cut = bisect_left(seqs, first)
+                    del seqs[:cut]
+                    del records[:cut]
+                    if not seqs:
+                        del postings[value]
+
+    def _first_seq(self) -> int:
+        return self._total - len(self.messages)
+
+    def query(self, sender: Optional[str] = None, receiver: Optional[str] = None,
+              performative: Optional[str] = None, direction: Optional[str] = None,
+              since: Union[str, datetime, None] = None, until: Union[str, datetime, None] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """Return in-memory records matching every given filter, oldest first
+
+        The most selective of the sender/receiver/performative/direction
+        indexes (or the sender+receiver pair index) is scanned, restricted by binary search to the ``since`` /
+        ``until`` time range (inclusive ISO timestamps or datetimes; naive
+        values are local time, like the record timestamps).
+
+        Args:
+            sender: Sender agent JID
+            receiver: Receiver agent JID
+            performative: Performative, case-insensitive
+            direction: "outgoing" or "incoming"
+            since: Earliest timestamp to include
+            until: Latest timestamp to include
+            limit: Maximum number of records to return
+        """
+        if since is not None:
+            since = _time_key(since)
+        if until is not None:
+            until = _time_key(until)
+        if performative is not None:
+            performative = performative.upper()
+
+        # Sequence range covered by the time filter
+        first = self._first_seq()
+        lo_i = max(first - self._times_base, 0)
+        hi_i = len(self._times)
+        if since is not None:
+            lo_i = bisect_left(self._times, since, lo_i)
+        if until is not None:
+            hi_i = bisect_right(self._times, until, lo_i)
+        lo, hi = lo_i + self._times_base, hi_i + self._times_base
+
+        filters = {}
+        for arg, value in (("sender", sender), ("receiver", receiver),
+                           ("performative", performative), ("direction", direction)):
+            if value is not None:
+                filters[INDEXED_FIELDS[arg]] = value
+
+        if filters:
+            keys = list(filters.items())
+            if sender is not None and receiver is not None:
+                keys.append(("pair", (sender, receiver)))
+            candidates = []
+            for field, value in keys:
+                entry = self._index[field].get(value)
+                if entry is None:
+                    return []
+                candidates.append(entry)
+            seqs, records = min(candidates, key=lambda e: len(e[0]))
+            start, stop = bisect_left(seqs, lo), bisect_left(seqs, hi)
+            source = (records[i] for i in range(start, stop))
+        else:
+            start = lo - first
+            # One pass over the deque; indexing it would be O(n) per record
+            source = itertools.islice(self.messages, start, start + hi - lo)
+
+        results = []
+        for record in source:
+            if all(record[field] == value for field, value in filters.items()):
+                results.append(record)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def sync(self):
+        """Flush the stream file and fsync it to disk"""
+        if self._stream is None:
+            return
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _schedule_fsync(self):
+        with self._fsync_lock:
+            if self._fsync_timer is not None:
+                # A pending fsync will cover this record too
+                return
+            delay = self.fsync_interval - (time.monotonic() - self._last_fsync)
+            if delay <= 0:
+                self.sync()
+                return
+            self._fsync_timer = threading.Timer(delay, self._timed_fsync)
+            self._fsync_timer.daemon = True
+            self._fsync_timer.start()
+
+    def _timed_fsync(self):
+        # Runs on the timer thread; records are already flushed by
+        # log_message, so only the descriptor is touched here
+        with self._fsync_lock:
+            self._fsync_timer = None
+            if self._stream is not None:
+                try:
+                    os.fsync(self._stream.fileno())
+                    self._last_fsync = time.monotonic()
+                except OSError as e:
+                    self.logger.error(f"Failed to fsync {self.stream_file}: {e}")
+
+    def close(self):
+        """Sync and close the stream file"""
+        with self._fsync_lock:
+            if self._fsync_timer is not None:
+                self._fsync_timer.cancel()
+                self._fsync_timer = None
+            if self._stream is not None:
+                self.sync()
+                self._stream.close()
+                self._stream = None
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Iterate over every logged record, reading the stream file if streaming"""
+        if self.stream_file is None:
+            yield from self.messages
+            return
+        if self._stream is not None:
+            self._stream.flush()
+        with open(self.stream_file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def export_json(self, path: Optional[str] = None):
+        """Write every record as an indented JSON array (the ``save_logs`` format)
+
+        Records are written one at a time, so exporting a long stream does
+        not load it into memory.
+        """
+        path = Path(path) if path else self.log_file
+        with open(path, 'w') as f:
+            f.write("[")
+            for i, record in enumerate(self.iter_records()):
+                body = json.dumps(record, indent=2).replace("\n", "\n  ")
+                f.write(("," if i else "") + "\n  " + body)
+            f.write("\n]" if f.tell() > 1 else "]")
+
     def save_logs(self):
         """Save all logged messages to JSON file"""
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.messages, f, indent=2)
+            if self.stream_file is not None:
+                self.sync()
+                self.export_json()
+            else:
+                with open(self.log_file, 'w') as f:
+                    json.dump(list(self.messages), f, indent=2)
             self.logger.info(f"Messages saved to {self.log_file}")
         except Exception as e:
             self.logger.error(f"Failed to save logs: {e}")
     
+    def save_compact(self, path: Optional[str] = None, compress: bool = False):
+        """Save all logged messages in the compact binary format
+
+        Args:
+            path: Output file, defaults to ``log_file`` with a ``.aclb`` suffix
+            compress: zlib-compress the file body as well
+        """
+        from compact_log import dump_compact
+
+        path = Path(path) if path else self.log_file.with_suffix(".aclb")
+        try:
+            if self._stream is not None:
+                self.sync()
+            dump_compact(self.iter_records(), path, compress)
+            self.logger.info(f"Messages saved to {path}")
+        except Exception as e:
+            self.logger.error(f"Failed to save compact logs: {e}")
+
     def get_summary(self) -> Dict:
         """Get a summary of communication statistics
         
         Returns:
             Dictionary with communication summary
         """
-        summary = {
-            "total_messages": len(self.messages),
-            "outgoing": sum(1 for m in self.messages if m["type"] == "outgoing"),
-            "incoming": sum(1 for m in self.messages if m["type"] == "incoming"),
-            "by_performative": {},
-            "unique_senders": set(),
-            "unique_receivers": set()
+        return {
+            "total_messages": self._total,
+            "outgoing": self._by_type.get("outgoing", 0),
+            "incoming": self._by_type.get("incoming", 0),
+            "by_performative": dict(self._by_performative),
+            "unique_senders": list(self._senders),
+            "unique_receivers": list(self._receivers),
+            "rates_per_second": self.get_rates()
         }
-        
-        # Count by performative
-        for msg in self.messages:
-            perf = msg["performative"]
-            summary["by_performative"][perf] = summary["by_performative"].get(perf, 0) + 1
-            summary["unique_senders"].add(msg["sender"])
-            summary["unique_receivers"].add(msg["receiver"])
-        
-        summary["unique_senders"] = list(summary["unique_senders"])
-        summary["unique_receivers"] = list(summary["unique_receivers"])
-        
-        return summary
     
     def print_summary(self):
         """Print a formatted summary of communication"""
@@ -95,11 +415,21 @@ class ACLMessageLogger:
         print(f"\nPerformatives Used:")
         for perf, count in summary['by_performative'].items():
             print(f"  - {perf}: {count}")
+        print(f"\nRates (last {self.rate_window:g}s):")
+        for perf, rate in summary['rates_per_second'].items():
+            print(f"  - {perf}: {rate:.2f} msg/s")
         print(f"\nParticipating Agents:")
         print(f"  Senders: {', '.join(summary['unique_senders'])}")
         print(f"  Receivers: {', '.join(summary['unique_receivers'])}")
         print("=" * 70 + "\n")
 
 
+def _time_key(value: Union[str, datetime]) -> float:
+    # Epoch seconds of an ISO timestamp or datetime; naive means local time
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
 # Global logger instance
 message_logger = ACLMessageLogger()
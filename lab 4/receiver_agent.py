@@ -5,10 +5,13 @@ Receives and responds to INFORM and REQUEST messages
 
 import asyncio
 import logging
+import time
 from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 from spade import agent
 from spade.behaviour import CyclicBehaviour
 from spade.message import Message
+from report_provider import CachedReportProvider
 
 # Configure logging
 logging.basicConfig(
@@ -17,55 +20,171 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ReceiverAgent")
 
+# Handlers are coroutines called as handler(behaviour, msg)
+Handler = Callable[..., Awaitable[None]]
+
 
 class ReceiverAgent(agent.Agent):
     """Receiver Agent that processes INFORM and REQUEST messages"""
 
+    # Number of messages that may be handled at the same time. 0 handles
+    # them one by one inside the receive loop.
+    max_concurrent_handlers = 0
+
+    # Seconds a diagnostics report is reused before it is regenerated, and
+    # how often a background task refreshes it (None disables the refresher)
+    report_ttl = 5.0
+    report_refresh_interval = None
+
+    # Optional agent_metrics.MetricsRegistry; None disables instrumentation
+    metrics = None
+
     class ReceiveBehaviour(CyclicBehaviour):
         """Behaviour to receive and process messages"""
 
-        def __init__(self, agent):
+        def __init__(self, agent, max_concurrent=0, report_ttl=5.0, report_refresh_interval=None):
             super().__init__()
             self.agent = agent
             self.message_count = 0
+            self.max_concurrent = max_concurrent
+            self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+            self._tasks = set()
+            self.handlers: Dict[Tuple[str, Optional[str], Optional[str]], Handler] = {}
+            self.register_handler("inform", type(self).on_inform)
+            self.register_handler("request", type(self).on_request)
+            self.report_provider = CachedReportProvider(self.generate_diagnostics_report, ttl=report_ttl)
+            self.report_refresh_interval = report_refresh_interval
+
+        async def on_start(self):
+            """Start keeping the diagnostics report warm, if configured"""
+            if self.report_refresh_interval:
+                self.report_provider.start_refresher(self.report_refresh_interval)
+
+        def register_handler(self, performative: str, handler: Handler,
+                             ontology: Optional[str] = None, protocol: Optional[str] = None):
+            """Route messages with ``performative`` to ``handler(behaviour, msg)``
+
+            A handler registered with an ontology and/or protocol only receives
+            messages that carry those values, and takes precedence over the
+            plain performative handler.
+            """
+            self.handlers[(performative.lower(), ontology, protocol)] = handler
+
+        def find_handler(self, msg) -> Optional[Handler]:
+            """Return the most specific handler for ``msg``, or None"""
+            performative = msg.metadata.get("performative", "unknown").lower()
+            ontology = msg.metadata.get("ontology")
+            protocol = msg.metadata.get("protocol")
+            handlers = self.handlers
+            return (handlers.get((performative, ontology, protocol))
+                    or handlers.get((performative, ontology, None))
+                    or handlers.get((performative, None, protocol))
+                    or handlers.get((performative, None, None)))
 
         async def run(self):
             msg = await self.receive(timeout=10)
             
             if msg:
+                metrics = self.agent.metrics
+                if metrics is not None:
+                    started = time.perf_counter()
+                    metrics.gauge("mailbox_depth", "Messages waiting in a behaviour mailbox",
+                                  agent=str(self.agent.jid), behaviour="ReceiveBehaviour").set(self.mailbox_size())
                 self.message_count += 1
-                sender = msg.sender
-                performative = msg.metadata.get("performative", "unknown")
-                content = msg.body
-                
-                logger.info("=" * 60)
-                logger.info(f"MESSAGE #{self.message_count} RECEIVED")
-                logger.info("=" * 60)
-                logger.info(f"[FROM] {sender}")
-                logger.info(f"[PERFORMATIVE] {performative.upper()}")
-                logger.info(f"[CONTENT] {content}")
-                logger.info(f"[TIMESTAMP] {datetime.now().isoformat()}")
-                
-                # Handle INFORM performative
-                if performative == "inform":
-                    logger.info("[ACTION] Processing INFORM message...")
-                    await self.handle_inform(sender, content)
-                
-                # Handle REQUEST performative
-                elif performative == "request":
-                    logger.info("[ACTION] Processing REQUEST message...")
-                    await self.handle_request(sender, content)
-                
-                logger.info()
+                if self._slots is None:
+                    await self.process_message(msg, self.message_count)
+                else:
+                    # Hand the message to its own task so a slow handler does
+                    # not hold up messages from other senders
+                    await self._slots.acquire()
+                    task = asyncio.create_task(self._process_in_slot(msg, self.message_count))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                if metrics is not None:
+                    metrics.histogram("behaviour_run_seconds", "Time spent in one behaviour run()",
+                                      agent=str(self.agent.jid), behaviour="ReceiveBehaviour"
+                                      ).observe(time.perf_counter() - started)
             else:
                 logger.debug("No message received (timeout)")
 
-        async def handle_inform(self, sender, content):
+        async def _process_in_slot(self, msg, number):
+            try:
+                await self.process_message(msg, number)
+            except Exception as e:
+                logger.error(f"[ERROR] Failed to handle message #{number}: {e}")
+            finally:
+                self._slots.release()
+
+        async def on_end(self):
+            """Let in-flight handlers finish before the behaviour stops"""
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            await self.report_provider.stop()
+
+        async def process_message(self, msg, number):
+            """Log an incoming message and trigger the action for its performative"""
+            sender = msg.sender
+            performative = msg.metadata.get("performative", "unknown")
+            content = msg.body
+            
+            logger.info("=" * 60)
+            logger.info(f"MESSAGE #{number} RECEIVED")
+            logger.info("=" * 60)
+            logger.info(f"[FROM] {sender}")
+            logger.info(f"[PERFORMATIVE] {performative.upper()}")
+            if msg.thread:
+                logger.info(f"[THREAD] {msg.thread}")
+            logger.info(f"[CONTENT] {content}")
+            logger.info(f"[TIMESTAMP] {datetime.now().isoformat()}")
+            
+            handler = self.find_handler(msg)
+            if handler is not None:
+                metrics = self.agent.metrics
+                if metrics is None:
+                    await handler(self, msg)
+                else:
+                    with metrics.time("handler_seconds", "Message handler latency",
+                                      agent=str(self.agent.jid), performative=performative):
+                        await handler(self, msg)
+            else:
+                logger.info(f"[ACTION] No handler registered for {performative.upper()}")
+            
+            logger.info("")
+
+        async def on_inform(self, msg):
+            """Handle INFORM performative"""
+            logger.info("[ACTION] Processing INFORM message...")
+            await self.handle_inform(msg.sender, msg.body, msg)
+
+        async def on_request(self, msg):
+            """Handle REQUEST performative"""
+            logger.info("[ACTION] Processing REQUEST message...")
+            await self.handle_request(msg.sender, msg.body, msg)
+
+        def make_reply(self, sender, msg=None):
+            """Create a reply tied to the conversation of ``msg``
+
+            The reply keeps the thread and conversation_id of the original
+            message and answers its reply_with with in_reply_to.
+            """
+            reply = Message(to=str(sender))
+            if msg is not None:
+                if msg.thread:
+                    reply.thread = msg.thread
+                conversation_id = msg.metadata.get("conversation_id")
+                if conversation_id:
+                    reply.set_metadata("conversation_id", conversation_id)
+                reply_with = msg.metadata.get("reply_with")
+                if reply_with:
+                    reply.set_metadata("in_reply_to", reply_with)
+            return reply
+
+        async def handle_inform(self, sender, content, msg=None):
             """Handle INFORM messages"""
             logger.info("[INFORM] Information received and acknowledged")
             
             # Send acknowledgement reply
-            reply = Message(to=sender)
+            reply = self.make_reply(sender, msg)
             reply.set_metadata("performative", "inform")
             reply.body = f"Acknowledgement: Received your information - '{content}'"
             
@@ -75,15 +194,15 @@ class ReceiverAgent(agent.Agent):
             await self.send(reply)
             logger.info("[REPLY] Acknowledgement sent\n")
 
-        async def handle_request(self, sender, content):
+        async def handle_request(self, sender, content, msg=None):
             """Handle REQUEST messages"""
             logger.info("[REQUEST] Request received, generating response...")
             
-            # Generate a response to the request
-            response_content = self.generate_diagnostics_report()
+            # Generate a response to the request (cached for report_ttl seconds)
+            response_content = await self.report_provider.get()
             
             # Send response back
-            reply = Message(to=sender)
+            reply = self.make_reply(sender, msg)
             reply.set_metadata("performative", "inform")
             reply.body = response_content
             
@@ -111,5 +230,11 @@ SYSTEM DIAGNOSTICS REPORT
         """Initialize the receiver agent"""
         logger.info("Receiver Agent starting up...")
         logger.info("Waiting for incoming messages...\n")
-        b = self.ReceiveBehaviour(self)
+        b = self.ReceiveBehaviour(
+            self,
+            max_concurrent=self.max_concurrent_handlers,
+            report_ttl=self.report_ttl,
+            report_refresh_interval=self.report_refresh_interval,
+        )
+        self.receive_behaviour = b
         self.add_behaviour(b)
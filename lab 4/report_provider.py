@@ -0,0 +1,96 @@
+"""
+Report Provider - Lab 4: Agent Communication using FIPA-ACL
+TTL-cached, single-flight access to an expensive report probe
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger("ReportProvider")
+
+
+class CachedReportProvider:
+    """Serve a report from a cache that is refreshed at most once per TTL
+
+    Concurrent callers that find the cache stale share a single in-flight
+    probe instead of each running their own. An optional background task
+    refreshes the report before it expires so callers never wait.
+    """
+
+    def __init__(self, probe: Callable, ttl: float = 5.0):
+        """Create the provider
+
+        Args:
+            probe: Callable (sync or async) that builds the report; a sync
+                probe runs in a worker thread
+            ttl: Seconds a report stays fresh
+        """
+        self.probe = probe
+        self.ttl = ttl
+        self.probe_count = 0
+        self._value = None
+        self._expires = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    def is_fresh(self) -> bool:
+        return self._value is not None and time.monotonic() < self._expires
+
+    async def get(self) -> str:
+        """Return the cached report, probing only if it has expired"""
+        if self.is_fresh():
+            return self._value
+        return await self.refresh()
+
+    async def refresh(self) -> str:
+        """Probe now, or join a probe that is already running"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._run_probe())
+        # shield() so one cancelled caller does not cancel the shared probe
+        return await asyncio.shield(self._inflight)
+
+    async def _run_probe(self) -> str:
+        try:
+            self.probe_count += 1
+            if inspect.iscoroutinefunction(self.probe):
+                value = await self.probe()
+            else:
+                # Sync probes do real CPU/disk work; keep it off the event loop
+                value = await asyncio.to_thread(self.probe)
+                if inspect.isawaitable(value):
+                    value = await value
+            self._value = value
+            self._expires = time.monotonic() + self.ttl
+            return value
+        finally:
+            self._inflight = None
+
+    def start_refresher(self, interval: Optional[float] = None):
+        """Keep the report warm by refreshing it every ``interval`` seconds
+
+        Args:
+            interval: Refresh period, defaults to 80% of the TTL
+        """
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.ensure_future(self._refresh_loop(interval or self.ttl * 0.8))
+
+    async def _refresh_loop(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Background report refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def stop(self):
+        """Stop the background refresher"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
@@ -5,9 +5,13 @@ Sends INFORM and REQUEST messages to the Receiver Agent
 
 import asyncio
 import logging
+import time
+import uuid
+from collections import deque
 from datetime import datetime
+from typing import Dict, Iterable, Optional
 from spade import agent
-from spade.behaviour import OneShotBehaviour
+from spade.behaviour import CyclicBehaviour, OneShotBehaviour
 from spade.message import Message
 
 # Configure logging
@@ -21,6 +25,9 @@ logger = logging.getLogger("SenderAgent")
 class SenderAgent(agent.Agent):
     """Sender Agent that initiates communication with INFORM and REQUEST messages"""
 
+    # Optional agent_metrics.MetricsRegistry; None disables instrumentation
+    metrics = None
+
     class SendBehaviour(OneShotBehaviour):
         """Behaviour to send messages"""
 
@@ -32,41 +39,184 @@ class SenderAgent(agent.Agent):
             logger.info("SENDING INFORM MESSAGE")
             logger.info("=" * 60)
             
-            inform_msg = Message(to=receiver_jid)
-            inform_msg.set_metadata("performative", "inform")
-            inform_msg.body = "System status is operational. All systems functioning normally."
+            inform_body = "System status is operational. All systems functioning normally."
             
             logger.info(f"[INFORM] To: {receiver_jid}")
-            logger.info(f"[INFORM] Content: {inform_msg.body}")
+            logger.info(f"[INFORM] Content: {inform_body}")
             logger.info(f"[INFORM] Timestamp: {datetime.now().isoformat()}")
             
-            await self.send(inform_msg)
-            logger.info("[INFORM] Message sent successfully\n")
-            
-            # Wait briefly before sending REQUEST
-            await asyncio.sleep(2)
+            # Send and wait (up to 2 seconds) for the acknowledgement
+            reply = await self.ask(receiver_jid, "inform", inform_body, timeout=2)
+            if reply is not None:
+                logger.info("[INFORM] Message sent successfully\n")
+            self.log_replies("INFORM", {receiver_jid: reply})
             
             # Send REQUEST message
             logger.info("=" * 60)
             logger.info("SENDING REQUEST MESSAGE")
             logger.info("=" * 60)
             
-            request_msg = Message(to=receiver_jid)
-            request_msg.set_metadata("performative", "request")
-            request_msg.body = "Please provide system diagnostics report"
+            request_body = "Please provide system diagnostics report"
             
             logger.info(f"[REQUEST] To: {receiver_jid}")
-            logger.info(f"[REQUEST] Content: {request_msg.body}")
+            logger.info(f"[REQUEST] Content: {request_body}")
             logger.info(f"[REQUEST] Timestamp: {datetime.now().isoformat()}")
             
-            await self.send(request_msg)
-            logger.info("[REQUEST] Message sent successfully\n")
-            
-            # Wait to receive responses
-            await asyncio.sleep(5)
+            # Send and wait (up to 5 seconds) for the diagnostics report
+            reply = await self.ask(receiver_jid, "request", request_body, timeout=5)
+            if reply is not None:
+                logger.info("[REQUEST] Message sent successfully\n")
+            self.log_replies("REQUEST", {receiver_jid: reply})
+
+        def _expect_reply(self, reply_with: str) -> asyncio.Future:
+            # Registered futures are resolved by ReplyRouterBehaviour when a
+            # message with the matching in_reply_to arrives
+            fut = asyncio.get_running_loop().create_future()
+            self.agent.pending_replies[reply_with] = fut
+            return fut
+
+        async def ask(self, to: str, performative: str, body: str,
+                      timeout: float = 5.0) -> Optional[Message]:
+            """Send a message and wait for the reply that answers it
+
+            The message carries a fresh reply_with id (and a thread of its
+            own); the reply is matched on its in_reply_to. The round-trip
+            time is logged and kept in ``agent.rtt_samples``.
+
+            Args:
+                to: Recipient agent JID
+                performative: Message performative
+                body: Message content
+                timeout: Seconds to wait for the reply
+
+            Returns:
+                The reply, or None if none arrived within ``timeout``
+            """
+            reply_with = uuid.uuid4().hex
+            msg = Message(to=str(to), body=body, thread=f"ask-{reply_with}")
+            msg.set_metadata("performative", performative)
+            msg.set_metadata("reply_with", reply_with)
+            fut = self._expect_reply(reply_with)
+
+            start = time.perf_counter()
+            try:
+                await self.send(msg)
+                reply = await asyncio.wait_for(fut, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"[ASK] No reply to {performative.upper()} from {to} within {timeout}s")
+                return None
+            finally:
+                self.agent.pending_replies.pop(reply_with, None)
+
+            rtt = time.perf_counter() - start
+            self.agent.rtt_samples.append(rtt)
+            if self.agent.metrics is not None:
+                self.agent.metrics.histogram("ask_rtt_seconds", "ask() round-trip time",
+                                             agent=str(self.agent.jid),
+                                             performative=performative.lower()).observe(rtt)
+            logger.info(f"[ASK] {performative.upper()} to {to} answered in {rtt * 1000:.1f} ms")
+            return reply
+
+        async def broadcast(self, recipients: Iterable[str], template: Message,
+                            max_in_flight: int = 100,
+                            reply_timeout: Optional[float] = None) -> Dict[str, Optional[Message]]:
+            """Send a copy of ``template`` to every recipient concurrently
+
+            All copies share the template's body, metadata and a common
+            thread id. At most ``max_in_flight`` sends are outstanding at a
+            time. With ``reply_timeout`` every copy gets its own unique
+            reply_with id and the replies are collected until every
+            recipient whose send succeeded has answered or the single
+            deadline passes.
+
+            Args:
+                recipients: Recipient agent JIDs
+                template: Message whose body and metadata are sent
+                max_in_flight: Maximum number of concurrent sends
+                reply_timeout: Seconds to wait for replies, None to not wait
+
+            Returns:
+                Mapping of recipient JID to its reply (None if none arrived)
+            """
+            recipients = list(dict.fromkeys(str(jid) for jid in recipients))
+            thread = template.thread or f"broadcast-{uuid.uuid4().hex}"
+            body = template.body
+            metadata = dict(template.metadata)
+            slots = asyncio.Semaphore(max_in_flight)
+
+            futures: Dict[str, asyncio.Future] = {}
+            reply_ids: Dict[str, str] = {}
+
+            async def send_one(jid):
+                msg = Message(to=jid, body=body, thread=thread, metadata=dict(metadata))
+                if reply_timeout:
+                    # Unique per copy, so concurrent broadcasts on the same
+                    # thread never share a pending_replies entry
+                    reply_with = uuid.uuid4().hex
+                    msg.set_metadata("reply_with", reply_with)
+                    reply_ids[jid] = reply_with
+                    futures[jid] = self._expect_reply(reply_with)
+                async with slots:
+                    await self.send(msg)
+
+            replies: Dict[str, Optional[Message]] = dict.fromkeys(recipients)
+            try:
+                results = await asyncio.gather(*(send_one(jid) for jid in recipients),
+                                               return_exceptions=True)
+                for jid, result in zip(recipients, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"[BROADCAST] Failed to send to {jid}: {result}")
+                        # No reply can come; do not wait for it
+                        fut = futures.pop(jid, None)
+                        if fut is not None:
+                            fut.cancel()
+                if not futures:
+                    return replies
+
+                # One deadline for the whole fan-out rather than per recipient
+                await asyncio.wait(futures.values(), timeout=reply_timeout)
+                for jid, fut in futures.items():
+                    if fut.done() and not fut.cancelled():
+                        replies[jid] = fut.result()
+                    else:
+                        fut.cancel()
+                return replies
+            finally:
+                for reply_with in reply_ids.values():
+                    self.agent.pending_replies.pop(reply_with, None)
+
+        def log_replies(self, label: str, replies: Dict[str, Optional[Message]]):
+            """Log the reply (or missing reply) from each recipient"""
+            for jid, reply in replies.items():
+                if reply is None:
+                    logger.info(f"[{label}] No reply from {jid}")
+                else:
+                    logger.info(f"[{label}] Reply from {jid}: {reply.body}")
+
+    class ReplyRouterBehaviour(CyclicBehaviour):
+        """Behaviour that hands incoming replies to the ask()/broadcast() waiting for them"""
+
+        async def run(self):
+            msg = await self.receive(timeout=10)
+            if msg is None:
+                return
+            if self.agent.metrics is not None:
+                self.agent.metrics.gauge("mailbox_depth", "Messages waiting in a behaviour mailbox",
+                                         agent=str(self.agent.jid),
+                                         behaviour="ReplyRouterBehaviour").set(self.mailbox_size())
+            reply_to = msg.metadata.get("in_reply_to")
+            fut = self.agent.pending_replies.pop(reply_to, None) if reply_to else None
+            if fut is not None and not fut.done():
+                fut.set_result(msg)
+            else:
+                performative = msg.metadata.get("performative", "unknown")
+                logger.info(f"[RECEIVED] Uncorrelated {performative.upper()} from {msg.sender}: {msg.body}")
 
     async def setup(self):
         """Initialize the sender agent"""
         logger.info("Sender Agent starting up...")
+        self.pending_replies: Dict[str, asyncio.Future] = {}
+        self.rtt_samples = deque(maxlen=1000)
+        self.add_behaviour(self.ReplyRouterBehaviour())
         b = self.SendBehaviour()
         self.add_behaviour(b)
@@ -0,0 +1,130 @@
+import uuid
+from array import array
+from typing import Dict, Iterator, Union
+
+from disaster_environment import EVENT_TYPES, LOCATIONS
+
+TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+LOCATION_CODES = {name: code for code, name in enumerate(LOCATIONS)}
+
+_MASK64 = (1 << 64) - 1
+
+
+def _parse_id(value) -> int:
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        return uuid.UUID(value).int
+
+
+def _format_id(value: int) -> str:
+    # Counter ids stay decimal; anything wider came from a uuid4.
+    return str(value) if value <= _MASK64 else str(uuid.UUID(int=value))
+
+
+class CompactEvent:
+    """Slotted event with an integer id and type/location stored as codes.
+
+    Supports ``ev["type"]``-style access so it can be used anywhere the
+    dict events from ``Environment.generate_event`` are expected.
+    """
+
+    __slots__ = ("id", "type_code", "severity", "location_code", "timestamp")
+
+    def __init__(self, id: int, type_code: int, severity: int, location_code: int, timestamp: float):
+        self.id = id
+        self.type_code = type_code
+        self.severity = severity
+        self.location_code = location_code
+        self.timestamp = timestamp
+
+    @property
+    def type(self) -> str:
+        return EVENT_TYPES[self.type_code]
+
+    @property
+    def location(self) -> str:
+        return LOCATIONS[self.location_code]
+
+    def __getitem__(self, key: str):
+        if key not in ("id", "type", "severity", "location", "timestamp"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactEvent):
+            return NotImplemented
+        return (self.id, self.type_code, self.severity, self.location_code, self.timestamp) == (
+            other.id, other.type_code, other.severity, other.location_code, other.timestamp)
+
+    def __repr__(self):
+        return (f"CompactEvent(id={self.id}, type={self.type!r}, severity={self.severity}, "
+                f"location={self.location!r}, timestamp={self.timestamp})")
+
+    @classmethod
+    def from_dict(cls, ev: Dict) -> "CompactEvent":
+        return cls(_parse_id(ev["id"]), TYPE_CODES[ev["type"]], ev["severity"],
+                   LOCATION_CODES[ev["location"]], ev["timestamp"])
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": _format_id(self.id),
+            "type": self.type,
+            "severity": self.severity,
+            "location": self.location,
+            "timestamp": self.timestamp,
+        }
+
+
+class EventBatch:
+    """Columnar event container backed by ``array`` columns.
+
+    Ids are split into two unsigned 64-bit columns so both counter ids and
+    128-bit uuid ids fit; a buffered event costs 27 bytes.
+    """
+
+    def __init__(self):
+        self.id_hi = array("Q")
+        self.id_lo = array("Q")
+        self.type_codes = array("B")
+        self.severities = array("B")
+        self.location_codes = array("B")
+        self.timestamps = array("d")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append_codes(self, id: int, type_code: int, severity: int, location_code: int, timestamp: float):
+        self.id_hi.append(id >> 64)
+        self.id_lo.append(id & _MASK64)
+        self.type_codes.append(type_code)
+        self.severities.append(severity)
+        self.location_codes.append(location_code)
+        self.timestamps.append(timestamp)
+
+    def append(self, ev: Union[Dict, CompactEvent]):
+        if not isinstance(ev, CompactEvent):
+            ev = CompactEvent.from_dict(ev)
+        self.append_codes(ev.id, ev.type_code, ev.severity, ev.location_code, ev.timestamp)
+
+    def __getitem__(self, i: int) -> CompactEvent:
+        return CompactEvent((self.id_hi[i] << 64) | self.id_lo[i], self.type_codes[i],
+                            self.severities[i], self.location_codes[i], self.timestamps[i])
+
+    def __iter__(self) -> Iterator[CompactEvent]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.itemsize * len(col) for col in (
+            self.id_hi, self.id_lo, self.type_codes, self.severities,
+            self.location_codes, self.timestamps))
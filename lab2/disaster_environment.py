@@ -1,8 +1,10 @@
 import asyncio
+import itertools
 import random
-import time
 import uuid
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Sequence
+
+from sim_clock import RealClock
 
 EVENT_TYPES = ["Earthquake", "Flood", "Fire", "Landslide"]
 LOCATIONS = [
@@ -17,9 +19,13 @@ LOCATIONS = [
 
 
 class Environment:
-    def __init__(self, seed: Optional[int] = None, base_probability: float = 0.2):
+    def __init__(self, seed: Optional[int] = None, base_probability: float = 0.2, clock=None,
+                 locations: Optional[Sequence[str]] = None):
         self.rand = random.Random(seed)
         self.base_probability = base_probability
+        self.clock = clock or RealClock()
+        self.locations = list(locations) if locations is not None else LOCATIONS
+        self._ids = itertools.count(1)
 
     def generate_event(self) -> Optional[Dict]:
         if self.rand.random() > self.base_probability:
@@ -27,25 +33,104 @@ class Environment:
 
         ev_type = self.rand.choice(EVENT_TYPES)
         severity = self.rand.randint(1, 5)
-        location = self.rand.choice(LOCATIONS)
+        location = self.rand.choice(self.locations)
         event = {
             "id": str(uuid.uuid4()),
             "type": ev_type,
             "severity": severity,
             "location": location,
-            "timestamp": time.time(),
+            "timestamp": self.clock.now(),
         }
         return event
 
+    def generate_events(self, n: int, sequential_ids: bool = False) -> List[Dict]:
+        """Generate ``n`` events in one call.
+
+        Consumes the random stream exactly like calling ``generate_event``
+        until it has returned ``n`` events, so a seeded environment yields the
+        same types, severities and locations on either path. All events of a
+        batch share one timestamp; ``sequential_ids`` swaps the per-event
+        uuid4 for a cheap counter.
+        """
+        if n <= 0 or self.base_probability <= 0:
+            return []
+
+        # Bind everything used in the loop once instead of per event.
+        draw = self.rand.random
+        choice = self.rand.choice
+        randint = self.rand.randint
+        threshold = self.base_probability
+        types = EVENT_TYPES
+        locations = self.locations
+        if sequential_ids:
+            ids = map(str, self._ids)
+        else:
+            ids = (str(uuid.uuid4()) for _ in itertools.repeat(None))
+        next_id = ids.__next__
+        now = self.clock.now()
+
+        events = []
+        append = events.append
+        while len(events) < n:
+            if draw() > threshold:
+                continue
+            ev_type = choice(types)
+            severity = randint(1, 5)
+            location = choice(locations)
+            append({
+                "id": next_id(),
+                "type": ev_type,
+                "severity": severity,
+                "location": location,
+                "timestamp": now,
+            })
+        return events
+
+    def generate_batch(self, n: int, sequential_ids: bool = True):
+        """Like ``generate_events`` but returns a columnar ``EventBatch``.
+
+        Type and location are drawn as codes; ``choice`` over a list of codes
+        consumes the random stream exactly like ``choice`` over the names, so
+        a seeded environment still produces the same events.
+        """
+        from compact_events import EventBatch, LOCATION_CODES
+
+        batch = EventBatch()
+        if n <= 0 or self.base_probability <= 0:
+            return batch
+
+        draw = self.rand.random
+        choice = self.rand.choice
+        randint = self.rand.randint
+        threshold = self.base_probability
+        type_codes = range(len(EVENT_TYPES))
+        location_codes = [LOCATION_CODES[loc] for loc in self.locations]
+        if sequential_ids:
+            next_id = self._ids.__next__
+        else:
+            next_id = lambda: uuid.uuid4().int
+        now = self.clock.now()
+
+        append = batch.append_codes
+        while len(batch) < n:
+            if draw() > threshold:
+                continue
+            type_code = choice(type_codes)
+            severity = randint(1, 5)
+            location_code = choice(location_codes)
+            append(next_id(), type_code, severity, location_code, now)
+        return batch
+
     async def run(self, queue: asyncio.Queue, interval: float = 1.0, duration: Optional[float] = None):
-        start = time.time()
+        clock = self.clock
+        start = clock.now()
         while True:
             ev = self.generate_event()
             if ev:
                 await queue.put(ev)
-            if duration is not None and (time.time() - start) >= duration:
+            if duration is not None and (clock.now() - start) >= duration:
                 break
-            await asyncio.sleep(interval)
+            await clock.sleep(interval)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Dict
+
+from compact_events import EventBatch
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_LOWEST = "drop_lowest"
+COALESCE = "coalesce"
+POLICIES = (BLOCK, DROP_OLDEST, DROP_LOWEST, COALESCE)
+
+
+class BoundedEventQueue(asyncio.Queue):
+    """asyncio.Queue with a selectable policy for when it is full.
+
+    - ``block``: the producer waits for space (plain asyncio.Queue behaviour).
+    - ``drop_oldest``: the oldest queued event is discarded.
+    - ``drop_lowest``: the lowest-severity event is discarded, which may be
+      the incoming one if nothing queued is less severe.
+    - ``coalesce``: an incoming event replaces a queued one with the same
+      type and location, keeping the more severe of the two; with no such
+      duplicate the producer waits for space.
+
+    Items are events (dicts or ``CompactEvent``) or whole ``EventBatch``
+    objects. A batch counts as one item: ``drop_lowest`` ranks it by its
+    most severe event, and ``coalesce`` never merges it, so a full queue
+    makes its producer wait.
+    """
+
+    def __init__(self, maxsize: int = 0, policy: str = BLOCK):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}, expected one of {POLICIES}")
+        super().__init__(maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    async def put(self, item):
+        _check_item(item)
+        if self.policy == BLOCK or not self.full():
+            await super().put(item)
+        elif self.policy == COALESCE:
+            if not self._coalesce(item):
+                await super().put(item)
+        else:
+            self.put_nowait(item)
+
+    def put_nowait(self, item):
+        _check_item(item)
+        if self.full():
+            if self.policy == DROP_OLDEST:
+                self._queue.popleft()
+                self._discard()
+            elif self.policy == DROP_LOWEST:
+                idx = min(range(len(self._queue)), key=lambda i: _severity(self._queue[i]))
+                if _severity(item) <= _severity(self._queue[idx]):
+                    self.dropped += 1
+                    return
+                del self._queue[idx]
+                self._discard()
+            elif self.policy == COALESCE and self._coalesce(item):
+                return
+        super().put_nowait(item)
+        depth = self.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _coalesce(self, item) -> bool:
+        if isinstance(item, EventBatch):
+            return False
+        key = (item["type"], item["location"])
+        for i, queued in enumerate(self._queue):
+            if isinstance(queued, EventBatch):
+                continue
+            if (queued["type"], queued["location"]) == key:
+                if item["severity"] >= queued["severity"]:
+                    self._queue[i] = item
+                self.coalesced += 1
+                return True
+        return False
+
+    def _discard(self):
+        # Dropped events will never be get()/task_done()'d by a consumer;
+        # settle them here so join() still returns.
+        self.dropped += 1
+        self.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "depth": self.qsize(),
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+
+def _check_item(item):
+    if isinstance(item, EventBatch):
+        return
+    try:
+        item["severity"], item["type"], item["location"]
+    except (KeyError, TypeError, IndexError):
+        raise TypeError(f"BoundedEventQueue accepts events and EventBatch objects, not {type(item).__name__}") \
+            from None
+
+
+def _severity(item) -> int:
+    if isinstance(item, EventBatch):
+        return max(item.severities, default=0)
+    return item["severity"]
@@ -1,44 +1,206 @@
 import asyncio
 import logging
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import queue
+import time
+from collections import deque
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
+from typing import Callable, Dict, List, Optional
+
+from compact_events import EventBatch
+from sim_clock import RealClock
 
 
 DEFAULT_LOGFILE = "disaster_events.log"
 
 
-def setup_logger(logfile: str = DEFAULT_LOGFILE) -> logging.Logger:
+class BatchingHandler(MemoryHandler):
+    """Buffers records and passes them to ``target`` once the buffer is full,
+    the oldest record is ``flush_interval`` seconds old, or an error arrives."""
+
+    def __init__(self, target: logging.Handler, capacity: int = 256, flush_interval: float = 1.0):
+        super().__init__(capacity, flushLevel=logging.ERROR, target=target)
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return (
+            len(self.buffer) >= self.capacity
+            or record.levelno >= self.flushLevel
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def flush(self):
+        super().flush()
+        self._last_flush = time.monotonic()
+
+
+class _BatchListener(QueueListener):
+    # Flush the batch when the queue goes quiet so a trailing partial
+    # batch does not sit in memory until the next burst.
+    def __init__(self, q: queue.Queue, batcher: BatchingHandler, *handlers: logging.Handler):
+        super().__init__(q, batcher, *handlers)
+        self.batcher = batcher
+
+    def dequeue(self, block: bool):
+        while True:
+            try:
+                return self.queue.get(block, self.batcher.flush_interval)
+            except queue.Empty:
+                if not block:
+                    raise
+                self.batcher.flush()
+
+    def stop(self):
+        super().stop()
+        self.batcher.close()
+
+
+_listeners: Dict[str, QueueListener] = {}
+
+
+def setup_logger(logfile: str = DEFAULT_LOGFILE, echo: bool = True, queued: bool = False,
+                 batch_size: int = 256, flush_interval: float = 1.0) -> logging.Logger:
+    """Configure the ``sensor_agent`` logger.
+
+    With ``queued=True`` the logger only enqueues records; a background
+    listener thread formats them and writes them to the rotating file in
+    batches of ``batch_size`` or every ``flush_interval`` seconds. Call
+    ``shutdown_logger`` to flush and stop the listener.
+    """
     logger = logging.getLogger("sensor_agent")
     logger.setLevel(logging.INFO)
     if not logger.handlers:
         handler = RotatingFileHandler(logfile, maxBytes=100_000, backupCount=2)
         fmt = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
         handler.setFormatter(fmt)
-        logger.addHandler(handler)
-        ch = logging.StreamHandler()
-        ch.setFormatter(fmt)
-        logger.addHandler(ch)
+        handlers = [handler]
+        if echo:
+            ch = logging.StreamHandler()
+            ch.setFormatter(fmt)
+            handlers.append(ch)
+
+        if queued:
+            q = queue.SimpleQueue()
+            batcher = BatchingHandler(handler, capacity=batch_size, flush_interval=flush_interval)
+            listener = _BatchListener(q, batcher, *handlers[1:])
+            listener.start()
+            _listeners[logger.name] = listener
+            logger.addHandler(QueueHandler(q))
+        else:
+            for h in handlers:
+                logger.addHandler(h)
     return logger
 
 
+def shutdown_logger(logger: logging.Logger):
+    """Flush and stop the background listener of a queued logger."""
+    listener = _listeners.pop(logger.name, None)
+    if listener is not None:
+        listener.stop()
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+        h.close()
+
+
 class SensorAgent:
-    def __init__(self, queue: asyncio.Queue, logger: Optional[logging.Logger] = None):
+    def __init__(self, queue: asyncio.Queue, logger: Optional[logging.Logger] = None, clock=None,
+                 echo: bool = True, metrics=None):
         self.queue = queue
-        self.logger = logger or setup_logger()
+        self.logger = logger or setup_logger(echo=echo)
+        self.clock = clock or RealClock()
+        self.echo = echo
         self.running = False
+        self.consumers: List[Callable[[List[Dict]], None]] = []
+        # Events of a dequeued EventBatch not handed out yet
+        self._pending = deque()
+        self.metrics = metrics
+        if metrics is not None:
+            self._queue_depth = metrics.gauge("sensor_queue_depth", "Events waiting in the sensor queue")
+            self._events = metrics.counter("sensor_events_total", "Events processed by the sensor")
+            self._batch_size = metrics.histogram("sensor_batch_size", "Events per monitor_batch call",
+                                                 buckets=(1, 10, 100, 1000, 10000))
+
+    def add_consumer(self, consumer: Callable[[List[Dict]], None]):
+        """Register a callable that receives each batch from ``monitor_batch``."""
+        self.consumers.append(consumer)
 
     async def monitor_once(self, timeout: float = 1.0):        
         try:
-            ev = await asyncio.wait_for(self.queue.get(), timeout)
-           
+            if self._pending:
+                ev = self._pending.popleft()
+            else:
+                ev = await self.clock.wait_for(self.queue.get(), timeout)
+                if isinstance(ev, EventBatch):
+                    # Hand out the rest of the batch on the following calls
+                    self._pending.extend(ev)
+                    if not self._pending:
+                        return None
+                    ev = self._pending.popleft()
+
             self.logger.info(f"EVENT type={ev['type']} severity={ev['severity']} location={ev['location']} id={ev['id']}")
-            
-            print(f"[Sensor] Detected {ev['type']} severity={ev['severity']} at {ev['location']}")
+
+            if self.echo:
+                print(f"[Sensor] Detected {ev['type']} severity={ev['severity']} at {ev['location']}")
+            if self.metrics is not None:
+                self._queue_depth.set(self.queue.qsize())
+                self._events.inc()
             return ev
         except asyncio.TimeoutError:
             
             return None
 
+    async def monitor_batch(self, max_items: int = 1000, max_latency: float = 0.5) -> List[Dict]:
+        """Wait up to ``max_latency`` for an event, then drain whatever else is
+        already queued (up to ``max_items`` in total) without awaiting again.
+        Queued ``EventBatch`` objects are unpacked into their events; events
+        of a batch beyond ``max_items`` are returned by the next call.
+
+        The batch is written as a single log record and handed to every
+        registered consumer. Returns an empty list on timeout.
+        """
+        pending = self._pending
+        batch = []
+        while pending and len(batch) < max_items:
+            batch.append(pending.popleft())
+        if not batch:
+            try:
+                first = await self.clock.wait_for(self.queue.get(), max_latency)
+            except asyncio.TimeoutError:
+                return []
+            pending.append(first)
+
+        get_nowait = self.queue.get_nowait
+        while len(batch) < max_items:
+            if not pending:
+                try:
+                    pending.append(get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            item = pending.popleft()
+            if isinstance(item, EventBatch):
+                pending.extendleft(reversed(list(item)))
+            else:
+                batch.append(item)
+        if not batch:
+            return []
+
+        self.logger.info("\n".join(
+            f"EVENT type={ev['type']} severity={ev['severity']} location={ev['location']} id={ev['id']}"
+            for ev in batch
+        ))
+        if self.echo:
+            print("\n".join(
+                f"[Sensor] Detected {ev['type']} severity={ev['severity']} at {ev['location']}"
+                for ev in batch
+            ))
+        for consumer in self.consumers:
+            consumer(batch)
+        if self.metrics is not None:
+            self._queue_depth.set(self.queue.qsize())
+            self._events.inc(len(batch))
+            self._batch_size.observe(len(batch))
+        return batch
+
     async def monitor(self, cycles: int = 10, timeout: float = 0.5):
         self.running = True
         for _ in range(cycles):
@@ -46,19 +208,21 @@ class SensorAgent:
         self.running = False
 
 
-async def demo_run(duration: float = 5.0):
+async def demo_run(duration: float = 5.0, clock=None, maxsize: int = 0, policy: str = "block"):
 
     from disaster_environment import Environment
+    from event_queue import BoundedEventQueue
 
-    q = asyncio.Queue()
-    env = Environment(seed=1, base_probability=0.4)
-    sensor = SensorAgent(q)
+    q = BoundedEventQueue(maxsize, policy)
+    env = Environment(seed=1, base_probability=0.4, clock=clock)
+    sensor = SensorAgent(q, clock=clock)
 
     
     env_task = asyncio.create_task(env.run(q, interval=0.5, duration=duration))
     sensor_task = asyncio.create_task(sensor.monitor(cycles=int(duration / 0.5) + 2, timeout=0.6))
 
     await asyncio.gather(env_task, sensor_task)
+    sensor.logger.info(f"QUEUE {q.stats()}")
 
 
 if __name__ == "__main__":
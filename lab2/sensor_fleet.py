@@ -0,0 +1,166 @@
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from collections import Counter
+from typing import Dict, List, Optional
+
+from disaster_environment import LOCATIONS, Environment
+from sensor_agent import SensorAgent, setup_logger, shutdown_logger
+from sim_clock import VirtualClock
+
+
+def shard_locations(shards: int) -> List[List[str]]:
+    """Split LOCATIONS round-robin into at most ``shards`` non-empty groups."""
+    shards = max(1, min(shards, len(LOCATIONS)))
+    return [LOCATIONS[i::shards] for i in range(shards)]
+
+
+async def _run_shard(index: int, locations: List[str], results, duration: float, interval: float,
+                     seed: Optional[int], base_probability: float, batch_size: int, virtual: bool):
+    clock = VirtualClock() if virtual else None
+    q = asyncio.Queue()
+    env = Environment(seed=seed, base_probability=base_probability, clock=clock, locations=locations)
+    logger = setup_logger(f"disaster_events.shard{index}.log", echo=False, queued=True)
+    sensor = SensorAgent(q, logger=logger, clock=clock, echo=False)
+
+    # Sensor batches can be tiny when the sensor keeps up; coalesce them so
+    # the parent receives few, large messages instead of one per event.
+    pending: List[Dict] = []
+
+    def forward(batch: List[Dict]):
+        pending.extend(batch)
+        if len(pending) >= batch_size:
+            results.put((index, pending[:]))
+            pending.clear()
+
+    sensor.add_consumer(forward)
+
+    env_task = asyncio.create_task(env.run(q, interval=interval, duration=duration))
+    while not env_task.done() or not q.empty():
+        await sensor.monitor_batch(batch_size, max_latency=interval)
+    await env_task
+    if pending:
+        results.put((index, pending))
+    shutdown_logger(logger)
+
+
+def _shard_worker(index: int, locations: List[str], results, duration: float, interval: float,
+                  seed: Optional[int], base_probability: float, batch_size: int, virtual: bool):
+    # The last message of a shard is (index, None) on success or
+    # (index, "<traceback>") on error; batches are lists.
+    try:
+        asyncio.run(_run_shard(index, locations, results, duration, interval,
+                               seed, base_probability, batch_size, virtual))
+    except BaseException:
+        results.put((index, traceback.format_exc()))
+        raise
+    results.put((index, None))
+
+
+class FleetAggregator:
+    """Collects event batches streamed back from the shard workers."""
+
+    def __init__(self):
+        self.total = 0
+        self.by_location = Counter()
+        self.by_type = Counter()
+        self.by_severity = Counter()
+        self.by_shard = Counter()
+
+    def add(self, shard: int, batch: List[Dict]):
+        self.total += len(batch)
+        self.by_shard[shard] += len(batch)
+        for ev in batch:
+            self.by_location[ev["location"]] += 1
+            self.by_type[ev["type"]] += 1
+            self.by_severity[ev["severity"]] += 1
+
+    def summary(self) -> Dict:
+        return {
+            "total_events": self.total,
+            "by_shard": dict(self.by_shard),
+            "by_location": dict(self.by_location),
+            "by_type": dict(self.by_type),
+            "by_severity": dict(sorted(self.by_severity.items())),
+        }
+
+
+def run_fleet(workers: Optional[int] = None, duration: float = 5.0, interval: float = 0.5,
+              seed: Optional[int] = None, base_probability: float = 0.4,
+              batch_size: int = 1000, virtual: bool = False, poll_interval: float = 1.0) -> Dict:
+    """Run one Environment/SensorAgent pair per location shard, each in its
+    own process, and aggregate their events in the parent.
+
+    ``workers`` defaults to the CPU count, capped at the number of locations.
+    Shard ``i`` is seeded with ``seed + i`` when a seed is given.
+
+    A shard that raises, or whose process dies without reporting back (e.g.
+    killed by the OOM killer), is listed in ``failed_shards`` with its error
+    or exit code; the counts then cover the other shards only.
+    """
+    shards = shard_locations(workers or os.cpu_count() or 1)
+    results = mp.Queue()
+    procs = []
+    for i, locations in enumerate(shards):
+        shard_seed = None if seed is None else seed + i
+        p = mp.Process(
+            target=_shard_worker,
+            args=(i, locations, results, duration, interval, shard_seed,
+                  base_probability, batch_size, virtual),
+            daemon=True,
+        )
+        p.start()
+        procs.append(p)
+
+    aggregator = FleetAggregator()
+    failed: Dict[int, str] = {}
+    running = set(range(len(procs)))
+
+    def handle(shard: int, batch):
+        if isinstance(batch, list):
+            aggregator.add(shard, batch)
+            return
+        running.discard(shard)
+        if batch is not None:
+            failed[shard] = batch
+
+    start = time.perf_counter()
+    while running:
+        try:
+            handle(*results.get(timeout=poll_interval))
+            continue
+        except queue.Empty:
+            pass
+        dead = [i for i in running if not procs[i].is_alive()]
+        if not dead:
+            continue
+        # A shard may have reported just before exiting; drain that first
+        try:
+            while True:
+                handle(*results.get(timeout=poll_interval))
+        except queue.Empty:
+            pass
+        for i in dead:
+            if i in running:
+                running.discard(i)
+                failed[i] = f"worker exited with code {procs[i].exitcode} without reporting"
+    elapsed = time.perf_counter() - start
+
+    for i, p in enumerate(procs):
+        p.join()
+        if p.exitcode and i not in failed:
+            failed[i] = f"worker exited with code {p.exitcode}"
+
+    summary = aggregator.summary()
+    summary["workers"] = len(procs)
+    summary["failed_shards"] = failed
+    summary["elapsed"] = elapsed
+    summary["events_per_sec"] = aggregator.total / elapsed if elapsed else 0.0
+    return summary
+
+
+if __name__ == "__main__":
+    print(run_fleet(duration=5.0))
@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, List, Tuple
+
+
+class RealClock:
+    """Wall-clock time; the default for Environment and SensorAgent."""
+
+    def now(self) -> float:
+        return time.time()
+
+    async def sleep(self, delay: float):
+        await asyncio.sleep(delay)
+
+    async def wait_for(self, aw: Awaitable, timeout: float):
+        return await asyncio.wait_for(aw, timeout)
+
+
+class VirtualClock:
+    """Discrete-event clock that jumps straight to the next scheduled wakeup.
+
+    Sleepers are kept in a heap ordered by their wake time. Once the event
+    loop has gone ``settle_ticks`` iterations without anybody scheduling a
+    new sleep, the clock advances to the earliest wake time and resumes every
+    sleeper due at that instant. Simulated time therefore runs as fast as
+    the CPU allows, as long as all waiting goes through the clock.
+    """
+
+    def __init__(self, start: float = 0.0, settle_ticks: int = 3):
+        self._now = start
+        self._timers: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._settle_ticks = settle_ticks
+        self._idle = 0
+        self._advancing = False
+
+    def now(self) -> float:
+        return self._now
+
+    async def sleep(self, delay: float):
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        heapq.heappush(self._timers, (self._now + delay, next(self._seq), fut))
+        self._kick(loop)
+        await fut
+
+    async def wait_for(self, aw: Awaitable, timeout: float):
+        task = asyncio.ensure_future(aw)
+        timer = asyncio.ensure_future(self.sleep(timeout))
+        try:
+            await asyncio.wait({task, timer}, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            task.cancel()
+            raise
+        finally:
+            timer.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        raise asyncio.TimeoutError()
+
+    def _kick(self, loop: asyncio.AbstractEventLoop):
+        self._idle = 0
+        if not self._advancing:
+            self._advancing = True
+            loop.call_soon(self._tick, loop)
+
+    def _tick(self, loop: asyncio.AbstractEventLoop):
+        timers = self._timers
+        while timers and timers[0][2].done():
+            heapq.heappop(timers)
+        if not timers:
+            self._advancing = False
+            return
+
+        self._idle += 1
+        if self._idle >= self._settle_ticks:
+            self._idle = 0
+            self._now = max(self._now, timers[0][0])
+            while timers and timers[0][0] <= self._now:
+                _, _, fut = heapq.heappop(timers)
+                if not fut.done():
+                    fut.set_result(None)
+        loop.call_soon(self._tick, loop)
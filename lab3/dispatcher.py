@@ -0,0 +1,265 @@
+"""
+Dispatcher - Lab 3: RescueAgent FSM
+Routes lab2 events to the nearest, least-loaded RescueAgent of a pool
+
+Distances between locations are computed once into a table, and each
+location keeps a heap of its agents ordered by load. Picking an agent only
+looks at the top of each location's heap, so a decision costs
+O(locations * log agents) and the number of agents can grow to thousands
+without scanning them.
+"""
+
+import heapq
+import itertools
+import math
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from incident_feed import severity_label
+from incident_scheduler import SEVERITY_RANK
+
+# Approximate coordinates (lat, lon) of the lab2 LOCATIONS
+LOCATION_COORDS: Dict[str, Tuple[float, float]] = {
+    "Madina": (5.6685, -0.1657),
+    "Circle": (5.5700, -0.2140),
+    "Teshie": (5.5833, -0.1000),
+    "Krofrom": (6.7050, -1.6110),
+    "Ashtown": (6.7030, -1.6220),
+    "Kantamanto": (5.5480, -0.2120),
+    "Nima": (5.5830, -0.1990),
+}
+
+
+def haversine_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+# Added to the cost of an agent with no free slot, so any agent with room
+# wins; among full agents distance and load still decide
+OVERFLOW_PENALTY_KM = 1e6
+
+
+class RescueUnit:
+    __slots__ = ("jid", "location", "capacity", "load", "deliver")
+
+    def __init__(self, jid: str, location: str, capacity: int, deliver: Optional[Callable] = None):
+        self.jid = jid
+        self.location = location
+        self.capacity = capacity
+        self.load = 0
+        self.deliver = deliver
+
+
+class Dispatcher:
+    """Assigns events to rescue agents by distance plus load
+
+    The cost of sending an agent is the distance from its base to the event
+    plus ``load_penalty_km`` for every rescue it is already running, so a
+    busy agent next door loses to an idle one slightly further away.
+
+    ``capacity`` is soft: an agent with a free rescue slot always wins over
+    a full one, but when every agent is full the event still goes to the
+    cheapest of them and waits in that agent's IncidentScheduler queue, so
+    no incident is dropped. ``dispatch`` only returns None with no agents.
+    """
+
+    def __init__(self, coords: Mapping[str, Tuple[float, float]] = LOCATION_COORDS,
+                 load_penalty_km: float = 2.0, min_severity: Optional[str] = None, metrics=None):
+        """Create a dispatcher with no agents
+
+        Args:
+            coords: Location name -> (lat, lon)
+            load_penalty_km: Extra cost per rescue an agent is already running
+            min_severity: ``route`` drops events below this severity before
+                dispatching them, e.g. ``RescueAgent.min_severity``
+            metrics: Optional agent_metrics.MetricsRegistry for decision latency
+        """
+        self.locations = list(coords)
+        self.load_penalty_km = load_penalty_km
+        self.metrics = metrics
+        self.min_rank = SEVERITY_RANK[min_severity] if min_severity else None
+        # For each location: every location as (distance_km, name), nearest first
+        self.nearest: Dict[str, List[Tuple[float, str]]] = {
+            src: sorted((haversine_km(coords[src], coords[dst]), dst) for dst in self.locations)
+            for src in self.locations
+        }
+        self.units: Dict[str, RescueUnit] = {}
+        # Per location: (full, load, seq, jid), so agents with a free slot come
+        # first and then the least loaded; entries whose load no longer
+        # matches the agent are stale
+        self._heaps: Dict[str, List[Tuple[bool, int, int, str]]] = {loc: [] for loc in self.locations}
+        self._members: Dict[str, set] = {loc: set() for loc in self.locations}
+        self._seq = itertools.count()
+        self.decisions = 0
+        self.unassigned = 0
+        self.overflowed = 0
+        self.filtered = 0
+        self.rejected = 0
+        self.decision_seconds = 0.0
+        self.max_decision_seconds = 0.0
+
+    def add_agent(self, jid: str, location: str, capacity: int = 1,
+                  deliver: Optional[Callable[[Dict], object]] = None):
+        """Add an agent based at ``location``
+
+        Args:
+            jid: Agent JID
+            location: Base location, one of the dispatcher's locations
+            capacity: Rescues the agent can run at once (its ``rescue_slots``)
+            deliver: Callable that hands a routed event to the agent, e.g.
+                its ``IncidentFeed.offer_event``; used by ``route``
+        """
+        if location not in self._heaps:
+            raise KeyError(f"Unknown location {location!r}")
+        self.remove_agent(jid)
+        unit = self.units[jid] = RescueUnit(jid, location, capacity, deliver)
+        self._members[location].add(jid)
+        self._push(unit)
+
+    def remove_agent(self, jid: str):
+        # Its heap entries become stale and are dropped when they surface
+        unit = self.units.pop(jid, None)
+        if unit is not None:
+            self._members[unit.location].discard(jid)
+
+    def dispatch(self, event: Dict) -> Optional[str]:
+        """Pick the agent for a lab2 event and count the rescue against its load
+
+        Returns:
+            The agent's JID, or None if there are no agents
+        """
+        start = time.perf_counter()
+        best: Optional[RescueUnit] = None
+        best_cost = math.inf
+        for distance, location in self.nearest[event["location"]]:
+            if distance >= best_cost:
+                # Every remaining location is at least this far away
+                break
+            unit = self._least_loaded(location)
+            if unit is not None:
+                cost = distance + self.load_penalty_km * unit.load
+                if unit.load >= unit.capacity:
+                    cost += OVERFLOW_PENALTY_KM
+                if cost < best_cost:
+                    best, best_cost = unit, cost
+
+        if best is not None:
+            if best.load >= best.capacity:
+                self.overflowed += 1
+            best.load += 1
+            self._push(best)
+        else:
+            self.unassigned += 1
+
+        elapsed = time.perf_counter() - start
+        self.decisions += 1
+        self.decision_seconds += elapsed
+        self.max_decision_seconds = max(self.max_decision_seconds, elapsed)
+        if self.metrics is not None:
+            self.metrics.histogram("dispatch_decision_seconds", "Time to choose a rescue agent").observe(elapsed)
+        return best.jid if best is not None else None
+
+    def route(self, event) -> Optional[str]:
+        """Dispatch ``event`` and deliver it to the chosen agent
+
+        The delivered event is a dict tagged with ``dispatched_to`` so the
+        agent knows to ``release`` its load when the rescue finishes. Events
+        below ``min_severity`` are dropped before dispatching, so they never
+        take a slot. If the agent's ``deliver`` still rejects the event
+        (returns False) the load is released again and None is returned.
+        """
+        if self.min_rank is not None and SEVERITY_RANK[severity_label(event["severity"])] < self.min_rank:
+            self.filtered += 1
+            return None
+        jid = self.dispatch(event)
+        if jid is None:
+            return None
+        unit = self.units[jid]
+        if unit.deliver is None:
+            return jid
+        record = event.to_dict() if hasattr(event, "to_dict") else dict(event)
+        record["dispatched_to"] = jid
+        if unit.deliver(record) is False:
+            self.rejected += 1
+            self.release(jid)
+            return None
+        return jid
+
+    def route_batch(self, events: Iterable) -> List:
+        """Route every event, e.g. as a lab2 ``SensorAgent`` consumer
+
+        Returns:
+            Events that found no agent at all (only possible with no agents)
+        """
+        unassigned = []
+        for event in events:
+            before = self.unassigned
+            self.route(event)
+            if self.unassigned > before:
+                unassigned.append(event)
+        return unassigned
+
+    def release(self, jid: str):
+        """Record that one rescue of ``jid`` has finished"""
+        unit = self.units.get(jid)
+        if unit is not None and unit.load > 0:
+            unit.load -= 1
+            self._push(unit)
+
+    def stats(self) -> Dict:
+        return {
+            "agents": len(self.units),
+            "decisions": self.decisions,
+            "unassigned": self.unassigned,
+            "overflowed": self.overflowed,
+            "filtered": self.filtered,
+            "rejected": self.rejected,
+            "mean_decision_us": self.decision_seconds / self.decisions * 1e6 if self.decisions else 0.0,
+            "max_decision_us": self.max_decision_seconds * 1e6,
+        }
+
+    def _push(self, unit: RescueUnit):
+        heap = self._heaps[unit.location]
+        heapq.heappush(heap, (unit.load >= unit.capacity, unit.load, next(self._seq), unit.jid))
+        # Rebuild once stale entries dominate so heaps stay O(agents)
+        if len(heap) > 64 and len(heap) > 4 * len(self._members[unit.location]):
+            self._compact(unit.location)
+
+    def _least_loaded(self, location: str) -> Optional[RescueUnit]:
+        heap = self._heaps[location]
+        while heap:
+            _, load, _, jid = heap[0]
+            unit = self.units.get(jid)
+            if unit is not None and unit.location == location and unit.load == load:
+                return unit
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self, location: str):
+        units = (self.units[jid] for jid in self._members[location])
+        heap = [(u.load >= u.capacity, u.load, next(self._seq), u.jid) for u in units]
+        heapq.heapify(heap)
+        self._heaps[location] = heap
+
+
+def demo(agents: int = 5000, events: int = 100_000, seed: int = 1):
+    """Dispatch random events over a large pool, finishing rescues as it goes"""
+    rand = random.Random(seed)
+    dispatcher = Dispatcher()
+    for i in range(agents):
+        dispatcher.add_agent(f"rescue{i}@localhost", rand.choice(dispatcher.locations), capacity=2)
+    active: List[str] = []
+    for _ in range(events):
+        active.append(dispatcher.dispatch({"location": rand.choice(dispatcher.locations)}))
+        # Keep roughly half the pool's capacity busy
+        while len(active) > agents:
+            dispatcher.release(active.pop(rand.randrange(len(active))))
+    print(dispatcher.stats())
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+
+from incident_scheduler import SEVERITY_RANK
+
+# lab2 events carry a 1-5 severity; RescueAgent works with labels
+LAB2_SEVERITY = {1: "Low", 2: "Low", 3: "Medium", 4: "High", 5: "Critical"}
+
+
+def severity_label(severity) -> str:
+    """Map a lab2 integer severity (or an existing label) to a RescueAgent label"""
+    if isinstance(severity, str):
+        return severity.capitalize()
+    return LAB2_SEVERITY[max(1, min(5, int(severity)))]
+
+
+class IncidentFeed:
+    """Awaitable stream of incidents that is filtered where events come in
+
+    Sources push events with ``offer``/``offer_event``/``offer_batch`` (the
+    last one can be registered directly as a lab2 ``SensorAgent`` consumer),
+    or ``pump`` a lab2 ``Environment`` queue. Events below ``min_severity``
+    are counted and discarded immediately, so they never wake the agent.
+    """
+
+    def __init__(self, min_severity: str = "High"):
+        self.min_rank = SEVERITY_RANK[min_severity]
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.accepted = 0
+        self.filtered = 0
+
+    def offer(self, severity: str, data=None) -> bool:
+        if SEVERITY_RANK[severity] < self.min_rank:
+            self.filtered += 1
+            return False
+        self.accepted += 1
+        self._queue.put_nowait((severity, data))
+        return True
+
+    def offer_event(self, event: Dict) -> bool:
+        return self.offer(severity_label(event["severity"]), event)
+
+    def offer_batch(self, events: Iterable[Dict]):
+        for event in events:
+            self.offer_event(event)
+
+    def wake(self):
+        """Wake a waiting ``get`` without an incident, e.g. when a rescue finishes"""
+        self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[Tuple[str, object]]:
+        """Wait for the next ``(severity, data)`` incident, or None after ``wake``"""
+        return await self._queue.get()
+
+    def get_nowait(self) -> Optional[Tuple[str, object]]:
+        return self._queue.get_nowait()
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    async def pump(self, queue: asyncio.Queue):
+        """Feed every event put on a lab2 event queue into this feed
+
+        The queue may hold ``EventBatch`` objects as well as single events
+        (dicts or ``CompactEvent``); lab2 must be importable.
+        """
+        from compact_events import EventBatch
+
+        while True:
+            item = await queue.get()
+            if isinstance(item, EventBatch):
+                self.offer_batch(item)
+            else:
+                self.offer_event(item)
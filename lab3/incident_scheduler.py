@@ -0,0 +1,94 @@
+import heapq
+import itertools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+SEVERITY_RANK = {"Low": 0, "Medium": 1, "High": 2, "Critical": 3}
+
+
+class Incident:
+    __slots__ = ("id", "severity", "data", "enqueued", "dispatched", "completed")
+
+    def __init__(self, id: int, severity: str, data, enqueued: float):
+        self.id = id
+        self.severity = severity
+        self.data = data
+        self.enqueued = enqueued
+        self.dispatched: Optional[float] = None
+        self.completed: Optional[float] = None
+
+    @property
+    def queue_wait(self) -> Optional[float]:
+        if self.dispatched is None:
+            return None
+        return self.dispatched - self.enqueued
+
+
+class IncidentScheduler:
+    """Severity-ordered incident queue with aging and a fixed number of rescue slots.
+
+    An incident's priority is its severity rank plus ``aging_rate`` points per
+    second it has waited, so a High incident that waited long enough is served
+    before a fresh Critical one and nothing starves. Because every waiting
+    incident ages at the same rate, the order only depends on
+    ``rank - aging_rate * enqueued``, which is fixed at submit time and can be
+    kept in a heap.
+    """
+
+    def __init__(self, slots: int = 1, aging_rate: float = 0.1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.slots = slots
+        self.aging_rate = aging_rate
+        self.clock = clock
+        self._heap: List[Tuple[float, int, Incident]] = []
+        self._ids = itertools.count(1)
+        self.active = 0
+        self.submitted = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.started = clock()
+
+    def submit(self, severity: str, data=None) -> Incident:
+        now = self.clock()
+        incident = Incident(next(self._ids), severity, data, now)
+        key = self.aging_rate * now - SEVERITY_RANK[severity]
+        heapq.heappush(self._heap, (key, incident.id, incident))
+        self.submitted += 1
+        return incident
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def free_slots(self) -> int:
+        return self.slots - self.active
+
+    def next_incident(self) -> Optional[Incident]:
+        """Take the most urgent pending incident if a rescue slot is free."""
+        if not self._heap or self.active >= self.slots:
+            return None
+        _, _, incident = heapq.heappop(self._heap)
+        incident.dispatched = self.clock()
+        self.active += 1
+        wait = incident.queue_wait
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return incident
+
+    def complete(self, incident: Incident):
+        incident.completed = self.clock()
+        self.active -= 1
+        self.completed += 1
+
+    def stats(self) -> Dict:
+        elapsed = self.clock() - self.started
+        dispatched = self.completed + self.active
+        return {
+            "submitted": self.submitted,
+            "pending": self.pending(),
+            "active": self.active,
+            "completed": self.completed,
+            "mean_queue_wait": self.total_wait / dispatched if dispatched else 0.0,
+            "max_queue_wait": self.max_wait,
+            "throughput_per_min": self.completed / elapsed * 60 if elapsed else 0.0,
+        }
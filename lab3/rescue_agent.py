@@ -1,65 +1,269 @@
 import asyncio
-import random
+import json
+import sys
+import time
+from collections import deque
 from pathlib import Path
+from typing import Optional
 from spade.agent import Agent
-from spade.behaviour import FSMBehaviour, State
+from spade.behaviour import CyclicBehaviour, FSMBehaviour, State
 from spade.container import run_container
+from spade.template import Template
 
-# Log file path (lab3/execution_trace.txt)
-LOG_PATH = Path(__file__).parent / "execution_trace.txt"
+from incident_feed import IncidentFeed
+from incident_scheduler import IncidentScheduler
+from trace_writer import TraceWriter
 
+# Structured trace path (lab3/execution_trace.jsonl), one JSON record per line
+TRACE_PATH = Path(__file__).parent / "execution_trace.jsonl"
 
-def log(msg: str):
-    print(msg, flush=True)
-    try:
-        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with LOG_PATH.open("a", encoding="utf-8") as f:
-            f.write(msg + "\n")
-    except Exception as e:
-        print(f"Failed to write log: {e}", flush=True)
+# Ontology of ACL messages that report a lab2 event to a RescueAgent
+INCIDENT_ONTOLOGY = "disaster-incident"
+
+
+_trace: Optional[TraceWriter] = None
+
+
+def get_trace() -> TraceWriter:
+    """Trace sink shared by every RescueAgent in the process, started on first use"""
+    global _trace
+    if _trace is None:
+        _trace = TraceWriter(TRACE_PATH, echo=True).start()
+    return _trace
+
+
+def close_trace():
+    """Flush and close the shared trace sink"""
+    global _trace
+    if _trace is not None:
+        _trace.close()
+        _trace = None
+
+class TimedState(State):
+    """FSM state that records its dwell time when the agent has metrics"""
+
+    state_name = ""
+
+    async def on_start(self):
+        self._entered = time.perf_counter()
+        self.agent.log(self.state_name, "enter")
+
+    async def on_end(self):
+        dwell = time.perf_counter() - self._entered
+        self.agent.log(self.state_name, "exit", dwell=round(dwell, 6))
+        metrics = self.agent.metrics
+        if metrics is not None:
+            metrics.histogram("fsm_state_dwell_seconds", "Time spent in an FSM state",
+                              agent=str(self.agent.jid), state=self.state_name).observe(dwell)
+
+class IdleState(TimedState):
+    state_name = "IDLE"
 
-class IdleState(State):
     async def run(self):
-        log("State: IDLE - waiting for sensor event")
-        await asyncio.sleep(0.5)
-        severity = random.choice(["Low", "Medium", "High", "Critical"])
-        log(f"Sensor event severity: {severity}")
-        if severity in ["High", "Critical"]:
+        agent = self.agent
+        scheduler = agent.scheduler
+        incidents = agent.incidents
+        if not agent.finished and not (scheduler.pending() and scheduler.free_slots()):
+            # Sleeps until the feed has a qualifying incident or a rescue finishes
+            agent.log("IDLE", "wait", "State: IDLE - waiting for sensor event")
+            self.submit(await incidents.get())
+        # Take the rest of a burst in the same tick
+        while not incidents.empty():
+            self.submit(incidents.get_nowait())
+
+        if agent.finished:
+            self.set_next_state("COMPLETED")
+        elif scheduler.pending() and scheduler.free_slots():
             self.set_next_state("RESCUING")
         else:
             self.set_next_state("IDLE")
 
-class RescuingState(State):
-    async def run(self):
-        log("State: RESCUING - performing rescue")
-        await asyncio.sleep(2)
-        log("Rescue actions completed")
-        self.set_next_state("COMPLETED")
+    def submit(self, item):
+        if item is None:
+            return
+        severity, data = item
+        scheduler = self.agent.scheduler
+        incident = scheduler.submit(severity, data)
+        self.agent.log("IDLE", "incident", f"Incident #{incident.id} queued, severity {severity} "
+                       f"({scheduler.pending()} pending)",
+                       incident=incident.id, severity=severity, pending=scheduler.pending())
+        self.agent.observe_queue()
+
+class RescuingState(TimedState):
+    state_name = "RESCUING"
 
-class CompletedState(State):
     async def run(self):
-        log("State: COMPLETED - mission finished")
-        await asyncio.sleep(0.2)
+        # Fill every free slot with the most urgent pending incidents; the
+        # rescues themselves run as tasks so IDLE keeps taking new events
+        agent = self.agent
+        while True:
+            incident = agent.scheduler.next_incident()
+            if incident is None:
+                break
+            agent.log("RESCUING", "dispatch",
+                      f"State: RESCUING - performing rescue of {incident.severity} incident "
+                      f"#{incident.id} (waited {incident.queue_wait:.2f}s)",
+                      incident=incident.id, severity=incident.severity,
+                      wait=round(incident.queue_wait, 6))
+            if agent.metrics is not None:
+                agent.metrics.histogram("rescue_queue_wait_seconds", "Time an incident waited for a rescue slot",
+                                        agent=str(agent.jid), severity=incident.severity
+                                        ).observe(incident.queue_wait)
+            task = asyncio.ensure_future(agent.rescue(incident))
+            agent.rescue_tasks.add(task)
+            task.add_done_callback(agent.rescue_tasks.discard)
+        agent.observe_queue()
         self.set_next_state("IDLE")
 
+class CompletedState(TimedState):
+    state_name = "COMPLETED"
+
+    async def run(self):
+        agent = self.agent
+        while agent.finished:
+            incident = agent.finished.popleft()
+            agent.log("COMPLETED", "finished", f"State: COMPLETED - mission finished (incident #{incident.id})",
+                      incident=incident.id)
+        if agent.scheduler.pending() and agent.scheduler.free_slots():
+            self.set_next_state("RESCUING")
+        else:
+            self.set_next_state("IDLE")
+
+class IncidentListener(CyclicBehaviour):
+    """Feeds incidents reported over ACL into the agent's IncidentFeed
+
+    Accepts INFORM messages with the ``disaster-incident`` ontology whose
+    body is a lab2 event as JSON (at least a ``severity`` field).
+    """
+
+    async def run(self):
+        msg = await self.receive(timeout=10)
+        if msg is None:
+            return
+        try:
+            event = json.loads(msg.body)
+            self.agent.incidents.offer_event(event)
+        except (ValueError, KeyError, TypeError) as e:
+            self.agent.log("", "error", f"Ignoring malformed incident from {msg.sender}: {e}")
+
 class RescueAgent(Agent):
+    # Optional agent_metrics.MetricsRegistry; None disables instrumentation
+    metrics = None
+    # Rescues that can run at the same time
+    rescue_slots = 2
+    # Priority points an incident gains per second it waits (see IncidentScheduler)
+    aging_rate = 0.1
+    # Seconds one rescue takes
+    rescue_duration = 2.0
+    # Events below this severity are dropped by the feed and never wake IDLE
+    min_severity = "High"
+    # Optional TraceWriter; None uses the process-wide one from get_trace()
+    trace = None
+    # Optional dispatcher.Dispatcher that assigns incidents to this agent;
+    # told when each rescue finishes so the agent's load drops again
+    dispatcher = None
+
+    def log(self, state: str, event: str, msg: str = "", **fields):
+        (self.trace or get_trace()).write(str(self.jid), state, event, msg, **fields)
+
+    async def rescue(self, incident):
+        try:
+            await asyncio.sleep(self.rescue_duration)
+            self.log("RESCUING", "rescue_done", f"Rescue actions completed (incident #{incident.id})",
+                     incident=incident.id, severity=incident.severity)
+        finally:
+            self.scheduler.complete(incident)
+            self.finished.append(incident)
+            self.incidents.wake()
+            # Only incidents the dispatcher assigned count against our load there
+            data = incident.data
+            if (self.dispatcher is not None and isinstance(data, dict)
+                    and data.get("dispatched_to") == str(self.jid)):
+                self.dispatcher.release(str(self.jid))
+            if self.metrics is not None:
+                self.metrics.counter("rescues_completed_total", "Rescues finished",
+                                     agent=str(self.jid), severity=incident.severity).inc()
+                self.metrics.histogram("rescue_seconds", "Time from incident report to rescue completed",
+                                       agent=str(self.jid)
+                                       ).observe(incident.completed - incident.enqueued)
+
+    def join_dispatcher(self, dispatcher, location: str):
+        """Register with a dispatcher.Dispatcher; call after the agent has started"""
+        self.dispatcher = dispatcher
+        dispatcher.add_agent(str(self.jid), location, capacity=self.rescue_slots,
+                             deliver=self.incidents.offer_event)
+
+    def observe_queue(self):
+        if self.metrics is not None:
+            self.metrics.gauge("incidents_pending", "Incidents waiting for a rescue slot",
+                               agent=str(self.jid)).set(self.scheduler.pending())
+            self.metrics.gauge("rescues_active", "Rescues in progress",
+                               agent=str(self.jid)).set(self.scheduler.active)
+
     async def setup(self):
-        log("RescueAgent starting...")
+        self.log("", "start", "RescueAgent starting...")
+        self.scheduler = IncidentScheduler(slots=self.rescue_slots, aging_rate=self.aging_rate)
+        self.finished = deque()
+        self.rescue_tasks = set()
+        self.incidents = IncidentFeed(self.min_severity)
         fsm = FSMBehaviour()
         fsm.add_state(name="IDLE", state=IdleState(), initial=True)
         fsm.add_state(name="RESCUING", state=RescuingState())
         fsm.add_state(name="COMPLETED", state=CompletedState())
         fsm.add_transition(source="IDLE", dest="RESCUING")
         fsm.add_transition(source="IDLE", dest="IDLE")
-        fsm.add_transition(source="RESCUING", dest="COMPLETED")
+        fsm.add_transition(source="IDLE", dest="COMPLETED")
+        fsm.add_transition(source="RESCUING", dest="IDLE")
+        fsm.add_transition(source="COMPLETED", dest="RESCUING")
         fsm.add_transition(source="COMPLETED", dest="IDLE")
-        self.add_behaviour(fsm)
+        # SPADE copies a message into every matching behaviour, and the FSM
+        # never reads incident reports, so keep them out of its mailbox
+        incident_reports = Template(metadata={"ontology": INCIDENT_ONTOLOGY})
+        self.add_behaviour(fsm, ~incident_reports)
+        self.add_behaviour(IncidentListener(),
+                           Template(metadata={"performative": "inform", "ontology": INCIDENT_ONTOLOGY}))
+
+# Rescue agents of the demo and their base locations (lab2 LOCATIONS)
+POOL = {
+    "rescue@localhost": "Circle",
+    "rescue2@localhost": "Madina",
+    "rescue3@localhost": "Krofrom",
+}
 
 async def main():
-    agent = RescueAgent("rescue@localhost", "password")
-    await agent.start(auto_register=True)
-    await asyncio.sleep(10)
-    await agent.stop()
+    # lab2 supplies the events: Environment -> SensorAgent -> Dispatcher -> IncidentFeed
+    sys.path.insert(0, str(Path(__file__).parent.parent / "lab2"))
+    from disaster_environment import Environment
+    from dispatcher import Dispatcher
+    from sensor_agent import SensorAgent
+
+    dispatcher = Dispatcher(min_severity=RescueAgent.min_severity)
+    agents = []
+    for jid, location in POOL.items():
+        agent = RescueAgent(jid, "password")
+        await agent.start(auto_register=True)
+        agent.join_dispatcher(dispatcher, location)
+        agents.append(agent)
+
+    events = asyncio.Queue()
+    env = Environment(base_probability=0.4)
+    sensor = SensorAgent(events, echo=False)
+    sensor.add_consumer(dispatcher.route_batch)
+
+    async def monitor():
+        while True:
+            await sensor.monitor_batch(max_latency=1.0)
+
+    env_task = asyncio.ensure_future(env.run(events, interval=0.5, duration=10))
+    monitor_task = asyncio.ensure_future(monitor())
+    await env_task
+    monitor_task.cancel()
+    for agent in agents:
+        agent.log("", "stats", f"Scheduler stats: {agent.scheduler.stats()}")
+        agent.log("", "stats", f"Feed: {agent.incidents.accepted} accepted, {agent.incidents.filtered} filtered")
+        await agent.stop()
+    print(f"Dispatcher: {dispatcher.stats()}, loads {[u.load for u in dispatcher.units.values()]}", flush=True)
+    close_trace()
 
 if __name__ == "__main__":
     run_container(main(), embedded_xmpp_server=True)
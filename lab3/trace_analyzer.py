@@ -0,0 +1,309 @@
+"""
+Trace Analyzer - Lab 3: RescueAgent FSM
+One-pass, constant-memory statistics over RescueAgent execution traces
+
+Reads the structured trace (``execution_trace.jsonl`` and its rotated
+backups) or the older plain-text ``execution_trace.txt`` and reports:
+
+    transitions   count matrix of state -> next state, per agent sequence
+    dwell         distribution of time spent per state visit
+    throughput    rescues completed per minute of trace time
+    reaction      IDLE -> RESCUING latency, from incident queued to dispatch
+
+Files are split into byte ranges that are parsed in parallel worker
+processes; every worker keeps only counters and fixed-size histograms, and
+the partial results are stitched back together in file order.
+
+Usage:
+    python trace_analyzer.py [execution_trace.jsonl.1 execution_trace.jsonl ...]
+                             [--workers N] [--chunk-mb MB] [--json]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TRACE = Path(__file__).parent / "execution_trace.jsonl"
+
+# Marks an agent whose previous state is only known to an earlier chunk
+_UNKNOWN = object()
+
+
+class Distribution:
+    """Log-bucketed histogram (5% relative resolution) that merges across chunks"""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    FLOOR = 1e-6
+    _LOG_GROWTH = math.log(1.05)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        b = 0 if value <= self.FLOOR else int(math.log(value / self.FLOOR) / self._LOG_GROWTH) + 1
+        self.buckets[b] = self.buckets.get(b, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Distribution"):
+        for b, n in other.buckets.items():
+            self.buckets[b] = self.buckets.get(b, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for b in sorted(self.buckets):
+            seen += self.buckets[b]
+            if seen >= rank:
+                return min(self.max, self.FLOOR * math.exp(b * self._LOG_GROWTH))
+        return self.max
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class TraceStats:
+    """Statistics of one contiguous piece of a trace
+
+    ``first_state`` holds, per agent, the first state entered in this piece
+    when the state before it lies in an earlier piece; ``merge`` uses it with
+    the earlier piece's ``last_state`` to count the transition across the
+    boundary.
+    """
+
+    def __init__(self):
+        self.transitions: Counter = Counter()
+        self.dwell: Dict[str, Distribution] = {}
+        self.reaction = Distribution()
+        self.rescues: Counter = Counter()
+        self.records = 0
+        self.malformed = 0
+        self.ts_min = math.inf
+        self.ts_max = -math.inf
+        self.first_state: Dict[str, str] = {}
+        self.last_state: Dict[str, Optional[str]] = {}
+
+    def add(self, record: Dict):
+        self.records += 1
+        agent = record.get("agent", "")
+        event = record.get("event")
+        ts = record.get("ts")
+        if ts is not None:
+            self.ts_min = min(self.ts_min, ts)
+            self.ts_max = max(self.ts_max, ts)
+
+        if event == "enter":
+            state = record["state"]
+            prev = self.last_state.get(agent, _UNKNOWN)
+            if prev is _UNKNOWN:
+                self.first_state[agent] = state
+            elif prev is not None:
+                self.transitions[(prev, state)] += 1
+            self.last_state[agent] = state
+        elif event == "exit":
+            dwell = record.get("dwell")
+            if dwell is not None:
+                state = record["state"]
+                dist = self.dwell.get(state)
+                if dist is None:
+                    dist = self.dwell[state] = Distribution()
+                dist.add(dwell)
+        elif event == "dispatch":
+            wait = record.get("wait")
+            if wait is not None:
+                self.reaction.add(wait)
+        elif event == "rescue_done":
+            self.rescues[agent] += 1
+        elif event == "start":
+            # A new run of the agent; do not link it to the previous run
+            self.last_state[agent] = None
+
+    def merge(self, later: "TraceStats"):
+        """Fold in the statistics of the piece that directly follows this one"""
+        for agent, state in later.first_state.items():
+            prev = self.last_state.get(agent, _UNKNOWN)
+            if prev is _UNKNOWN:
+                self.first_state.setdefault(agent, state)
+            elif prev is not None:
+                self.transitions[(prev, state)] += 1
+        self.last_state.update(later.last_state)
+        self.transitions.update(later.transitions)
+        for state, dist in later.dwell.items():
+            if state in self.dwell:
+                self.dwell[state].merge(dist)
+            else:
+                self.dwell[state] = dist
+        self.reaction.merge(later.reaction)
+        self.rescues.update(later.rescues)
+        self.records += later.records
+        self.malformed += later.malformed
+        self.ts_min = min(self.ts_min, later.ts_min)
+        self.ts_max = max(self.ts_max, later.ts_max)
+
+    def report(self) -> Dict:
+        states = sorted({s for pair in self.transitions for s in pair})
+        span = self.ts_max - self.ts_min if self.ts_max > self.ts_min else None
+        total_rescues = sum(self.rescues.values())
+        return {
+            "records": self.records,
+            "malformed": self.malformed,
+            "states": states,
+            "transitions": {src: {dst: self.transitions.get((src, dst), 0) for dst in states}
+                            for src in states},
+            "dwell_seconds": {state: dist.summary() for state, dist in sorted(self.dwell.items())},
+            "reaction_seconds": self.reaction.summary(),
+            "rescues": total_rescues,
+            "rescues_per_agent": dict(self.rescues),
+            "span_seconds": span,
+            "rescues_per_minute": total_rescues / span * 60 if span else None,
+        }
+
+
+# Plain-text trace lines (lab3/execution_trace.txt) as structured events
+_TEXT_EVENTS = (
+    ("RescueAgent starting", {"event": "start"}),
+    ("State: IDLE", {"event": "enter", "state": "IDLE"}),
+    ("State: RESCUING", {"event": "enter", "state": "RESCUING"}),
+    ("State: COMPLETED", {"event": "enter", "state": "COMPLETED"}),
+    ("Rescue actions completed", {"event": "rescue_done"}),
+)
+
+
+def _parse_text(line: str) -> Optional[Dict]:
+    for prefix, record in _TEXT_EVENTS:
+        if line.startswith(prefix):
+            return record
+    return None
+
+
+def _iter_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Lines whose first byte lies in ``[start, end)``"""
+    with open(path, "rb") as f:
+        if start:
+            # Skip the partial line; it belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+
+def analyze_range(path: str, start: int, end: int) -> TraceStats:
+    stats = TraceStats()
+    loads = json.loads
+    for line in _iter_range(path, start, end):
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] == b"{":
+            try:
+                record = loads(line)
+            except ValueError:
+                stats.malformed += 1
+                continue
+        else:
+            record = _parse_text(line.decode("utf-8", "replace"))
+            if record is None:
+                stats.records += 1
+                continue
+        stats.add(record)
+    return stats
+
+
+def split_file(path: str, chunk_size: int) -> List[Tuple[str, int, int]]:
+    size = os.path.getsize(path)
+    return [(path, start, min(size, start + chunk_size)) for start in range(0, size, chunk_size)] or \
+        [(path, 0, 0)]
+
+
+def analyze(paths: List[str], workers: Optional[int] = None,
+            chunk_size: int = 64 * 1024 * 1024) -> TraceStats:
+    """Analyze trace files given oldest first (e.g. ``trace.jsonl.2``, ``.1``, ``trace.jsonl``)"""
+    ranges = [r for path in paths for r in split_file(str(path), chunk_size)]
+    total = TraceStats()
+    if len(ranges) == 1 or workers == 1:
+        parts = (analyze_range(*r) for r in ranges)
+        for part in parts:
+            total.merge(part)
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order, which the stitching relies on
+        for part in pool.map(analyze_range, *zip(*ranges)):
+            total.merge(part)
+    return total
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"Records: {report['records']} ({report['malformed']} malformed)", "", "Transitions:"]
+    states = report["states"]
+    width = max([len(s) for s in states] + [9])
+    lines.append(" " * (width + 2) + "".join(f"{s:>{width + 2}}" for s in states))
+    for src in states:
+        row = report["transitions"][src]
+        lines.append(f"  {src:<{width}}" + "".join(f"{row[dst]:>{width + 2}}" for dst in states))
+
+    def fmt(summary: Dict) -> str:
+        if not summary["count"]:
+            return "no samples"
+        return (f"n={summary['count']} mean={summary['mean']:.3f}s p50={summary['p50']:.3f}s "
+                f"p90={summary['p90']:.3f}s p99={summary['p99']:.3f}s max={summary['max']:.3f}s")
+
+    lines += ["", "Dwell time:"]
+    lines += [f"  {state:<{width}} {fmt(summary)}" for state, summary in report["dwell_seconds"].items()]
+    lines += ["", f"IDLE -> RESCUING reaction: {fmt(report['reaction_seconds'])}", ""]
+    rate = report["rescues_per_minute"]
+    lines.append(f"Rescues: {report['rescues']}"
+                 + (f" over {report['span_seconds']:.1f}s ({rate:.2f}/min)" if rate is not None else ""))
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[1])
+    parser.add_argument("paths", nargs="*", default=[str(DEFAULT_TRACE)],
+                        help="trace files, oldest first")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-mb", type=float, default=64.0, help="bytes per work unit, in MiB")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    stats = analyze(args.paths, workers=args.workers, chunk_size=max(1, int(args.chunk_mb * 1024 * 1024)))
+    report = stats.report()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+
+class TraceWriter:
+    """Buffered JSON-lines trace sink shared by any number of agents
+
+    ``write`` only formats the record and appends it to an in-memory buffer;
+    a background thread writes the buffer to a long-lived file handle once
+    it holds ``max_buffer`` records or ``flush_interval`` seconds have
+    passed, so the event loop never touches the disk. The file is rotated to
+    ``<path>.1`` .. ``<path>.<backup_count>`` when it would exceed
+    ``max_bytes``.
+
+    Each record has ``ts`` (time.monotonic), ``agent``, ``state`` and
+    ``event``, plus ``msg`` and any extra fields given to ``write``.
+    """
+
+    def __init__(self, path: Union[str, Path], max_buffer: int = 512, flush_interval: float = 1.0,
+                 max_bytes: int = 64 * 1024 * 1024, backup_count: int = 5, echo: bool = False):
+        self.path = Path(path)
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.echo = echo
+        self.records_written = 0
+        self._buffer: List[str] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+            self._thread = threading.Thread(target=self._run, name="TraceWriter", daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self, agent: str, state: str, event: str, msg: str = "", **fields):
+        record = {"ts": round(time.monotonic(), 6), "agent": agent, "state": state, "event": event}
+        if msg:
+            record["msg"] = msg
+        record.update(fields)
+        line = json.dumps(record, separators=(",", ":"))
+        if self.echo and msg:
+            print(msg, flush=True)
+        with self._cond:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.max_buffer:
+                self._cond.notify()
+
+    def flush(self):
+        """Write everything buffered so far (blocking)"""
+        with self._cond:
+            lines, self._buffer = self._buffer, []
+        self._write(lines)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or len(self._buffer) >= self.max_buffer,
+                                    timeout=self.flush_interval)
+                lines, self._buffer = self._buffer, []
+                closed = self._closed
+            self._write(lines)
+            if closed:
+                return
+
+    def _write(self, lines: List[str]):
+        if not lines or self._file is None:
+            return
+        data = "\n".join(lines) + "\n"
+        with self._io_lock:
+            self._write_data(data, len(lines))
+
+    def _write_data(self, data: str, count: int):
+        try:
+            if self.max_bytes and self._file.tell() + len(data) > self.max_bytes and self._file.tell():
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self.records_written += count
+        except OSError as e:
+            print(f"Failed to write trace: {e}", flush=True)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._file = self.path.open("w", encoding="utf-8")